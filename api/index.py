@@ -13,8 +13,12 @@ if BASE_DIR not in sys.path:
 os.chdir(BASE_DIR)
 
 try:
+    from utils.startup import StartupTimer
+    timer = StartupTimer()
     from app import create_app
-    app = create_app()
+    timer.mark('imports')
+    app = create_app(timer=timer)
+    print(f"Cold start: {timer.summary()}")
 except Exception as e:
     print(f"Error initializing app: {e}")
     import traceback
@@ -6,41 +6,108 @@ from flask import Flask
 from config import Config
 from models import db
 from models.recipe import Recipe
-from models.user import User
-from models.meal_plan import MealPlan
+from utils.startup import StartupTimer
 
-def create_app(config_class=Config):
-    """Application factory pattern"""
+def create_app(config_class=Config, timer=None):
+    """
+    Application factory pattern
+    
+    The cold-start breakdown is kept in app.extensions['startup_timer'].
+    """
+    timer = timer or StartupTimer()
     app = Flask(__name__)
     app.config.from_object(config_class)
+    timer.mark('config')
     
     # Initialize database
     db.init_app(app)
+    timer.mark('database')
+    
+    # Initialize response cache
+    from utils.cache import init_cache
+    init_cache(app)
+    timer.mark('cache')
+    
+    # Time SQL statements per request
+    from utils.sql_metrics import init_sql_metrics
+    init_sql_metrics(app)
+    timer.mark('sql_metrics')
+    
+    # Responsive image thumbnails for templates
+    from utils.images import init_images
+    init_images(app)
+    
+    # Cached recipe card and detail markup
+    from utils.fragments import init_fragments
+    init_fragments(app)
+    
+    # Fingerprinted static URLs and response compression
+    from utils.assets import init_assets
+    from utils.compression import init_compression
+    init_assets(app)
+    init_compression(app)
+    timer.mark('static')
     
     # Register blueprints
     from routes.main import main_bp
     from routes.recipes import recipes_bp
     from routes.nutrition import nutrition_bp
     from routes.meal_planner import meal_planner_bp
+    from routes.debug import debug_bp
     
     app.register_blueprint(main_bp)
     app.register_blueprint(recipes_bp)
     app.register_blueprint(nutrition_bp)
     app.register_blueprint(meal_planner_bp)
+    app.register_blueprint(debug_bp)
+    timer.mark('blueprints')
+    
+    # Register CLI commands
+    from commands import register_commands
+    register_commands(app)
+    timer.mark('commands')
     
-    # Create database tables and seed if needed
     with app.app_context():
+        if app.config.get('DATABASE_SNAPSHOT'):
+            # Prebuilt snapshot: schema, indexes and seed data are already there
+            from utils.snapshot import init_snapshot
+            init_snapshot(app)
+        else:
+            if db.engine.dialect.name == 'sqlite':
+                from utils.sqlite_pragmas import apply_sqlite_pragmas
+                apply_sqlite_pragmas(db.engine, app.config.get('SQLITE_PRAGMAS'))
+            setup_database()
+    timer.mark('database_setup')
+    
+    app.extensions['startup_timer'] = timer
+    return app
+
+def setup_database():
+    """Create tables, migrate and seed a writable database"""
+    # Import every model so create_all sees its table
+    from models.user import User
+    from models.meal_plan import MealPlan
+    from models.tag import Tag
+    from models.daily_nutrition import DailyNutrition
+    from utils.migrations import schema_lock, upgrade_database
+    
+    with schema_lock():
         db.create_all()
         
-        # Auto-seed on Vercel (in-memory database)
+        # Add indexes introduced after the database was created
+        upgrade_database()
+        
+        # Auto-seed on Vercel (in-memory or first use of a shared database)
         if os.environ.get('VERCEL') and not Recipe.query.first():
             try:
                 from utils.seed_data import seed_database
                 seed_database()
             except Exception as e:
                 print(f"Warning: Could not seed database: {e}")
-    
-    return app
+        
+        # Make sure there is a user to plan and log meals for
+        from utils.current_user import ensure_default_user
+        ensure_default_user()
 
 if __name__ == '__main__':
     app = create_app()
@@ -56,4 +123,3 @@ if __name__ == '__main__':
         port=app.config['PORT'],
         debug=app.config['DEBUG']
     )
-
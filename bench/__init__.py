@@ -0,0 +1,6 @@
+"""
+Benchmarks for EATR Health App
+
+Run a benchmark from the project root, e.g.:
+    python -m bench.recipe_to_dict
+"""
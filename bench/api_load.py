@@ -0,0 +1,211 @@
+"""
+Benchmark: latency, throughput and query counts of the JSON APIs
+
+Seeds a synthetic dataset (users, recipes, a year of meal plans) and
+drives each endpoint with the Flask test client, counting SQL statements
+per request. With --url it instead drives a running server (e.g.
+gunicorn on a database created with --seed-only) from several threads;
+query counts are not available in that mode.
+
+Results can be written as JSON with --output and compared with a
+previous run with --compare.
+"""
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from sqlalchemy import event
+from bench.common import BenchConfig, DISHES, FOODS, TAGS, create_bench_app, seed_dataset
+from models import db
+from models.recipe import CATEGORY_ORDER
+
+def search_url(rng):
+    return f'/recipes/api/search?q={rng.choice(FOODS)}+{rng.choice(DISHES)[:3]}'
+
+def filter_url(rng):
+    return f'/recipes/api/filter?category={rng.choice(CATEGORY_ORDER)}&tags={rng.choice(TAGS)}'
+
+def stats_url(rng):
+    day = date.today() - timedelta(days=rng.randint(0, 364))
+    return f'/nutrition/api/stats?date={day.isoformat()}'
+
+ENDPOINTS = {
+    'search': search_url,
+    'filter': filter_url,
+    'stats': stats_url,
+    'weekly-stats': lambda rng: '/nutrition/api/weekly-stats',
+    'week': lambda rng: '/meal-planner/api/week',
+}
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+def summarize(latencies, elapsed, sizes, queries=None, errors=0):
+    """Summary numbers for one endpoint"""
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p90_ms': round(percentile(latencies, 90), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(max(latencies), 2),
+        'bytes': round(sum(sizes) / len(sizes)),
+        'queries': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+def run_in_process(args):
+    """Seed an in-memory database and measure through the test client"""
+    class LoadConfig(BenchConfig):
+        RESPONSE_CACHE = args.cache
+        DEBUG = False
+    
+    app = create_bench_app(LoadConfig)
+    started = time.perf_counter()
+    with app.app_context():
+        user_ids = seed_dataset(args.recipes, args.users, args.days, seed=args.seed)
+        engine = db.engine
+    print(f"Seeded {args.recipes} recipes, {args.users} users, {args.days} days "
+          f"in {time.perf_counter() - started:.1f}s")
+    
+    statements = [0]
+    @event.listens_for(engine, 'before_cursor_execute')
+    def count_statement(*_):
+        statements[0] += 1
+    
+    # One client (session cookie) per synthetic user
+    clients = []
+    for user_id in user_ids:
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = user_id
+        clients.append(client)
+    
+    rng = random.Random(args.seed)
+    results = {}
+    for name, make_url in selected_endpoints(args):
+        for _ in range(args.warmup):
+            rng.choice(clients).get(make_url(rng))
+        
+        latencies, sizes, queries, errors = [], [], [], 0
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            client, url = rng.choice(clients), make_url(rng)
+            statements[0] = 0
+            start = time.perf_counter()
+            response = client.get(url)
+            latencies.append((time.perf_counter() - start) * 1000)
+            queries.append(statements[0])
+            sizes.append(len(response.data))
+            errors += response.status_code != 200
+        results[name] = summarize(latencies, time.perf_counter() - started, sizes, queries, errors)
+    return results
+
+def run_against_server(args):
+    """Measure a running server with concurrent threads"""
+    def fetch(url):
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(args.url.rstrip('/') + url, timeout=30) as response:
+                size, ok = len(response.read()), response.status == 200
+        except OSError:
+            size, ok = 0, False
+        return (time.perf_counter() - start) * 1000, size, ok
+    
+    rng = random.Random(args.seed)
+    results = {}
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for name, make_url in selected_endpoints(args):
+            list(pool.map(fetch, [make_url(rng) for _ in range(args.warmup)]))
+            urls = [make_url(rng) for _ in range(args.requests)]
+            started = time.perf_counter()
+            responses = list(pool.map(fetch, urls))
+            elapsed = time.perf_counter() - started
+            results[name] = summarize(
+                [ms for ms, _, _ in responses], elapsed, [size for _, size, _ in responses],
+                errors=sum(not ok for _, _, ok in responses)
+            )
+    return results
+
+def selected_endpoints(args):
+    return [(name, ENDPOINTS[name]) for name in args.endpoints]
+
+def seed_file(args):
+    """Create a seeded SQLite file for benchmarking a real server"""
+    class SeedConfig(BenchConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + args.seed_only
+    
+    app = create_bench_app(SeedConfig)
+    with app.app_context():
+        seed_dataset(args.recipes, args.users, args.days, seed=args.seed)
+    print(f"Seeded {args.seed_only}; start a server with DATABASE_URL=sqlite:///{args.seed_only}")
+
+def print_results(results, baseline=None):
+    """Print a table, with changes against a baseline run if given"""
+    print(f"  {'endpoint':13} {'req/s':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'queries':>8} {'KiB':>7} {'errors':>7}")
+    for name, result in results.items():
+        queries = '-' if result['queries'] is None else f"{result['queries']:g}"
+        print(f"  {name:13} {result['throughput']:8.0f} {result['p50_ms']:6.1f}ms {result['p90_ms']:6.1f}ms "
+              f"{result['p99_ms']:6.1f}ms {queries:>8} {result['bytes'] / 1024:7.1f} {result['errors']:7}")
+        before = (baseline or {}).get(name)
+        if before:
+            changes = ', '.join(
+                f"{key} {(result[key] - before[key]) / before[key]:+.0%}"
+                for key in ('throughput', 'p50_ms', 'p99_ms') if before[key]
+            )
+            print(f"  {'':13} vs baseline: {changes}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--recipes', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=10, help='users with meal plans, including the default user')
+    parser.add_argument('--days', type=int, default=365, help='days of meal plans per user')
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument('--cache', choices=['none', 'simple'], default='none',
+                        help='response cache backend (default: none, to measure the database)')
+    parser.add_argument('--url', help='benchmark a running server instead of the test client')
+    parser.add_argument('--concurrency', type=int, default=8, help='threads for --url')
+    parser.add_argument('--seed-only', metavar='PATH', help='write a seeded SQLite file and exit')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    args = parser.parse_args()
+    
+    if args.seed_only:
+        seed_file(args)
+        return
+    
+    results = run_against_server(args) if args.url else run_in_process(args)
+    
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['endpoints']
+    print_results(results, baseline)
+    
+    if args.output:
+        report = {
+            'settings': {key: value for key, value in vars(args).items()
+                         if key not in ('output', 'compare', 'seed_only')},
+            'environment': {
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'machine': platform.machine(),
+            },
+            'endpoints': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Shared setup for benchmarks
+"""
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from config import Config
+from app import create_app
+from models import db
+from models.daily_nutrition import DailyNutrition
+from models.meal_plan import MEAL_TYPES, MealPlan
+from models.recipe import CATEGORY_ORDER, Recipe, encode_json_field
+from models.user import User
+from utils.recipe_import import insert_batch
+
+# Vocabulary for synthetic recipe names, descriptions and ingredients
+FOODS = ['chicken', 'salmon', 'tofu', 'quinoa', 'lentil', 'egg', 'oat', 'avocado',
+         'spinach', 'rice', 'turkey', 'bean', 'yogurt', 'berry', 'pasta', 'mushroom']
+DISHES = ['salad', 'bowl', 'wrap', 'soup', 'stir fry', 'curry', 'omelette', 'smoothie']
+TAGS = ['Vegan', 'Vegetarian', 'High-Protein', 'Low-Carb', 'Gluten-Free',
+        'High-Fiber', 'Keto', 'Diabetes-Friendly', 'Quick']
+
+class BenchConfig(Config):
+    """In-memory database for benchmarks"""
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    DATABASE_SNAPSHOT = None
+
+def create_bench_app(config_class=BenchConfig):
+    """Create an app with an empty benchmark database"""
+    return create_app(config_class)
+
+def make_recipes(count):
+    """Insert synthetic recipes with realistic JSON field sizes"""
+    for i in range(count):
+        recipe = Recipe(
+            name=f'Recipe {i}',
+            description='A synthetic benchmark recipe.',
+            category='Lunch',
+            calories=400 + i % 300,
+            protein=20,
+            carbs=40,
+            fats=15,
+            fiber=5
+        )
+        recipe.ingredients = [f'{n} cups ingredient {n}' for n in range(10)]
+        recipe.instructions = [f'Step {n}: do something useful with the ingredients' for n in range(8)]
+        recipe.tags_json = encode_json_field(['Vegetarian', 'High-Protein', 'Low-Carb'])
+        db.session.add(recipe)
+    db.session.commit()
+
+def seed_dataset(recipes=10000, users=10, days=365, seed=0):
+    """
+    Insert a varied synthetic dataset in bulk
+    
+    Every user gets breakfast, lunch and dinner planned for each of the
+    last `days` days through the end of the current week.
+    
+    Returns:
+        List of all user ids
+    """
+    rng = random.Random(seed)
+    
+    batch = []
+    for i in range(recipes):
+        food, other, dish = rng.choice(FOODS), rng.choice(FOODS), rng.choice(DISHES)
+        protein, carbs, fats = rng.uniform(5, 60), rng.uniform(5, 90), rng.uniform(2, 40)
+        row = {
+            'name': f'{food.title()} {dish.title()} {i}',
+            'description': f'A {dish} with {food} and {other}.',
+            'image_url': None,
+            'category': rng.choice(CATEGORY_ORDER),
+            'prep_time': rng.randint(5, 30),
+            'cook_time': rng.randint(0, 60),
+            'servings': rng.randint(1, 4),
+            'calories': round(protein * 4 + carbs * 4 + fats * 9, 1),
+            'protein': round(protein, 1),
+            'carbs': round(carbs, 1),
+            'fats': round(fats, 1),
+            'fiber': round(rng.uniform(0, 15), 1),
+            'ingredients_json': encode_json_field([f'1 cup {food}', f'1/2 cup {other}', 'Salt and pepper']),
+            'instructions_json': encode_json_field(['Prepare the ingredients', f'Cook the {dish}', 'Serve']),
+        }
+        tags = rng.sample(TAGS, rng.randint(1, 3))
+        row['tags_json'] = encode_json_field(tags)
+        batch.append((row, tags))
+        if len(batch) == 1000:
+            insert_batch(batch)
+            batch = []
+    insert_batch(batch)
+    
+    # Plan for the default user created at startup too, which is who
+    # requests without a session cookie act as
+    if users > 1:
+        db.session.execute(db.insert(User), [{'username': f'bench_user_{n}'} for n in range(users - 1)])
+    user_ids = db.session.scalars(db.select(User.id).order_by(User.id)).all()
+    
+    recipe_ids = db.session.scalars(db.select(Recipe.id)).all()
+    today = date.today()
+    last_day = today + timedelta(days=6 - today.weekday())
+    days_planned = [last_day - timedelta(days=n) for n in range(days + (last_day - today).days)]
+    db.session.execute(db.insert(MealPlan), [
+        {'user_id': user_id, 'recipe_id': rng.choice(recipe_ids), 'date': day, 'meal_type': meal_type}
+        for user_id in user_ids
+        for day in days_planned
+        for meal_type in MEAL_TYPES
+    ])
+    db.session.commit()
+    DailyNutrition.rebuild()
+    return user_ids
+
+def time_requests(client, url, repeats):
+    """
+    Issue the same GET repeatedly
+    
+    Returns:
+        Tuple of (median latency in ms, response body size in bytes)
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), len(response.data)
@@ -0,0 +1,56 @@
+"""
+Benchmark: /recipes/api/filter response size and latency
+
+Compares walking the whole catalog (what the old unpaginated response
+returned) with a single keyset page and a sparse page limited to the
+fields the planner's recipe picker needs.
+"""
+import argparse
+import statistics
+import time
+from bench.common import create_bench_app, make_recipes, time_requests
+
+def time_whole_catalog(client, repeats):
+    """Follow next_cursor through every page with all fields"""
+    timings = []
+    for _ in range(repeats):
+        size = 0
+        cursor = None
+        start = time.perf_counter()
+        while True:
+            url = '/recipes/api/filter?limit=200'
+            if cursor is not None:
+                url += f'&after={cursor}'
+            response = client.get(url)
+            size += len(response.data)
+            cursor = response.get_json()['next_cursor']
+            if cursor is None:
+                break
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--recipes', type=int, default=5000)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    
+    app = create_bench_app()
+    with app.app_context():
+        make_recipes(args.recipes)
+    client = app.test_client()
+    
+    results = [
+        ('all fields, whole catalog', time_whole_catalog(client, args.repeats)),
+        ('all fields, 50 per page', time_requests(
+            client, '/recipes/api/filter', args.repeats)),
+        ('id,name,calories, 50 per page', time_requests(
+            client, '/recipes/api/filter?fields=id,name,calories', args.repeats)),
+    ]
+    
+    print(f"/recipes/api/filter over {args.recipes} recipes (median of {args.repeats})")
+    for label, (latency, size) in results:
+        print(f"  {label:32} {latency:8.1f} ms  {size / 1024:9.1f} KiB")
+
+if __name__ == '__main__':
+    main()
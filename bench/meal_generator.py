@@ -0,0 +1,62 @@
+"""
+Benchmark: automatic week planning over a large recipe catalog
+
+Builds a synthetic nutrition matrix (no database) and times
+generate_plan() for a 7-day plan, reporting how close the daily
+totals land to the goals.
+"""
+import argparse
+import time
+import numpy as np
+from utils.meal_generator import generate_plan, MEAL_CATEGORIES
+from utils.recipe_matrix import NutritionMatrix
+
+def make_matrix(count, seed=0):
+    """Random but plausible per-recipe nutrition for count recipes"""
+    rng = np.random.default_rng(seed)
+    categories = rng.choice(list(MEAL_CATEGORIES.values()) + ['Snacks'], size=count)
+    protein = rng.uniform(5, 60, count)
+    carbs = rng.uniform(5, 90, count)
+    fats = rng.uniform(2, 40, count)
+    calories = protein * 4 + carbs * 4 + fats * 9
+    fiber = rng.uniform(0, 15, count)
+    return NutritionMatrix(
+        ids=np.arange(1, count + 1),
+        categories=categories,
+        values=np.column_stack([calories, protein, carbs, fats, fiber])
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--recipes', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    
+    matrix = make_matrix(args.recipes)
+    goals = {'calories': 2000, 'protein': 150, 'carbs': 200, 'fats': 65}
+    
+    timings = []
+    for seed in range(args.repeats):
+        start = time.perf_counter()
+        plan = generate_plan(matrix, goals, args.days, seed=seed)
+        timings.append((time.perf_counter() - start) * 1000)
+    
+    # Relative error of each day's totals against the goals
+    errors = []
+    for meals in plan:
+        rows = matrix.rows_for_ids(list(meals.values()))
+        totals = matrix.values[rows].sum(axis=0)
+        errors.append([
+            abs(totals[NutritionMatrix.COLUMNS.index(name)] - goal) / goal
+            for name, goal in goals.items()
+        ])
+    errors = np.array(errors) * 100
+    
+    print(f"generate_plan: {args.days} days over {args.recipes} recipes")
+    print(f"  median: {np.median(timings):7.1f} ms   max: {max(timings):7.1f} ms")
+    for i, name in enumerate(goals):
+        print(f"  {name:9} mean error {errors[:, i].mean():5.1f}%   max {errors[:, i].max():5.1f}%")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: scalar nutrition_calc functions in a loop vs batch variants
+
+Runs each function over the same random rows both ways, checks that
+the results agree exactly and reports the speedup.
+"""
+import argparse
+import time
+import numpy as np
+from utils.nutrition_calc import (
+    calculate_macros_percentage, calculate_macros_percentage_batch,
+    calculate_daily_remaining, calculate_daily_remaining_batch,
+    calculate_calories_from_macros, calculate_calories_from_macros_batch
+)
+
+def timed(fn):
+    """Run fn once, returning (result, elapsed ms)"""
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    protein = rng.uniform(0, 200, args.rows).round(1)
+    carbs = rng.uniform(0, 300, args.rows).round(1)
+    fats = rng.uniform(0, 100, args.rows).round(1)
+    protein[:10] = carbs[:10] = fats[:10] = 0
+    consumed = {'calories': protein * 4 + carbs * 4 + fats * 9, 'protein': protein, 'carbs': carbs, 'fats': fats}
+    goals = {'calories': 2000, 'protein': 150, 'carbs': 200, 'fats': 65}
+    rows = list(zip(protein.tolist(), carbs.tolist(), fats.tolist()))
+    
+    cases = [
+        (
+            'calculate_macros_percentage',
+            lambda: [calculate_macros_percentage(*row) for row in rows],
+            lambda: calculate_macros_percentage_batch(protein, carbs, fats),
+            lambda loop, batch: all(
+                np.array_equal([r[name] for r in loop], batch[name]) for name in batch
+            )
+        ),
+        (
+            'calculate_daily_remaining',
+            lambda: [
+                calculate_daily_remaining({name: float(consumed[name][i]) for name in consumed}, goals)
+                for i in range(args.rows)
+            ],
+            lambda: calculate_daily_remaining_batch(consumed, goals),
+            lambda loop, batch: all(
+                np.array_equal([r[name] for r in loop], batch[name]) for name in batch
+            )
+        ),
+        (
+            'calculate_calories_from_macros',
+            lambda: [calculate_calories_from_macros(*row) for row in rows],
+            lambda: calculate_calories_from_macros_batch(protein, carbs, fats),
+            lambda loop, batch: np.array_equal(loop, batch)
+        ),
+    ]
+    
+    print(f"{args.rows} rows: Python loop vs batch")
+    for name, loop_fn, batch_fn, same in cases:
+        loop, loop_ms = timed(loop_fn)
+        batch, batch_ms = timed(batch_fn)
+        print(f"  {name:32} loop {loop_ms:8.1f} ms   batch {batch_ms:6.1f} ms   "
+              f"{loop_ms / batch_ms:6.1f}x   identical: {same(loop, batch)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Micro-benchmark: Recipe.to_dict() with and without cached JSON fields
+
+Loads a few thousand synthetic recipes and serializes each one several
+times, as a page render plus API response would. The "uncached" run
+clears the per-instance cache before every call, matching the old
+behaviour of json.loads on every property access.
+"""
+import argparse
+import time
+from bench.common import create_bench_app, make_recipes
+from models.recipe import Recipe, clear_parsed_json
+
+def run(recipes, repeats, cached):
+    """Time repeated to_dict() calls over all recipes"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for recipe in recipes:
+            if not cached:
+                clear_parsed_json(recipe)
+            recipe.to_dict()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--recipes', type=int, default=3000)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    
+    app = create_bench_app()
+    with app.app_context():
+        make_recipes(args.recipes)
+        recipes = Recipe.query.all()
+        
+        uncached = run(recipes, args.repeats, cached=False)
+        cached = run(recipes, args.repeats, cached=True)
+    
+    calls = args.recipes * args.repeats
+    print(f"to_dict() x {calls} ({args.recipes} recipes x {args.repeats})")
+    print(f"  uncached: {uncached * 1000:8.1f} ms  ({uncached / calls * 1e6:.1f} us/call)")
+    print(f"  cached:   {cached * 1000:8.1f} ms  ({cached / calls * 1e6:.1f} us/call)")
+    print(f"  speedup:  {uncached / cached:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""
+Benchmark: NutritionMatrix.recommend() top-k latency
+
+Times recommendation queries over a synthetic catalog, with and
+without a category filter, the way /recipes/api/recommend issues them.
+"""
+import argparse
+import time
+import numpy as np
+from bench.meal_generator import make_matrix
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--recipes', type=int, default=100000)
+    parser.add_argument('--repeats', type=int, default=50)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+    
+    matrix = make_matrix(args.recipes)
+    target = {'calories': 600, 'protein': 40, 'carbs': 60, 'fats': 20}
+    
+    print(f"recommend(k={args.k}) over {args.recipes} recipes (median of {args.repeats})")
+    for label, category in (('all recipes', None), ('category=Dinner', 'Dinner')):
+        timings = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            matrix.recommend(target, k=args.k, category=category, max_calories=target['calories'])
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"  {label:16} {np.median(timings):7.2f} ms")
+
+if __name__ == '__main__':
+    main()
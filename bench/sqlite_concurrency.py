@@ -0,0 +1,124 @@
+"""
+Benchmark: mixed read/write load on file-backed SQLite across processes
+
+Each worker process runs its own app against one shared database file,
+like gunicorn workers, issuing dashboard reads and meal logging writes
+for a fixed time. The load runs once with SQLite's default settings and
+once with the SQLITE_PRAGMAS profile, each on a fresh database.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from config import Config
+from models import db
+from utils.migrations import upgrade_database
+from bench.common import create_bench_app, make_recipes
+
+READ_URLS = ['/nutrition/api/stats', '/nutrition/api/weekly-stats', '/meal-planner/api/week']
+
+def make_config(path, pragmas):
+    """Config class for a database file, with or without the pragma profile"""
+    class ConcurrencyConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        SQLITE_PRAGMAS = Config.SQLITE_PRAGMAS if pragmas else {}
+        DATABASE_SNAPSHOT = None
+        RESPONSE_CACHE = 'none'
+        DEBUG = False
+    return ConcurrencyConfig
+
+def run_worker(path, pragmas, args, seed, barrier, results):
+    """
+    Start an app, wait for every worker, then issue requests for the duration
+    
+    Puts (read latencies in ms, write latencies in ms, error count) on results.
+    """
+    app = create_bench_app(make_config(path, pragmas))
+    client = app.test_client()
+    rng = random.Random(seed)
+    reads, writes, errors = [], [], 0
+    
+    barrier.wait()
+    stop_at = time.perf_counter() + args.duration
+    while time.perf_counter() < stop_at:
+        is_write = rng.random() < args.write_ratio
+        start = time.perf_counter()
+        if is_write:
+            response = client.post('/meal-planner/api/add', json={
+                'recipe_id': rng.randint(1, args.recipes),
+                'date': (date.today() - timedelta(days=rng.randint(0, 6))).isoformat(),
+                'meal_type': rng.choice(['breakfast', 'lunch', 'dinner', 'snack'])
+            })
+        else:
+            response = client.get(rng.choice(READ_URLS))
+        elapsed = (time.perf_counter() - start) * 1000
+        if response.status_code != 200:
+            errors += 1
+        (writes if is_write else reads).append(elapsed)
+    results.put((reads, writes, errors))
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+def run_profile(pragmas, args):
+    """Run the load on a fresh database and return summary numbers"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.db')
+        app = create_bench_app(make_config(path, pragmas))
+        with app.app_context():
+            make_recipes(args.recipes)
+            # Backfill tags here rather than racing in every worker
+            upgrade_database()
+            db.engine.dispose()
+        
+        context = multiprocessing.get_context('spawn')
+        barrier = context.Barrier(args.workers)
+        queue = context.Queue()
+        workers = [
+            context.Process(target=run_worker, args=(path, pragmas, args, seed, barrier, queue))
+            for seed in range(args.workers)
+        ]
+        for worker in workers:
+            worker.start()
+        results = [queue.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+    
+    reads = [ms for worker_reads, _, _ in results for ms in worker_reads]
+    writes = [ms for _, worker_writes, _ in results for ms in worker_writes]
+    return {
+        'throughput': (len(reads) + len(writes)) / args.duration,
+        'read_p50': percentile(reads, 50),
+        'read_p99': percentile(reads, 99),
+        'write_p50': percentile(writes, 50),
+        'write_p99': percentile(writes, 99),
+        'errors': sum(errors for _, _, errors in results)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per profile')
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--recipes', type=int, default=500)
+    args = parser.parse_args()
+    
+    print(f"{args.workers} processes, {args.write_ratio:.0%} writes, {args.duration:g}s per profile")
+    print(f"  {'profile':10} {'req/s':>8} {'read p50':>9} {'read p99':>9} "
+          f"{'write p50':>10} {'write p99':>10} {'errors':>7}")
+    for label, pragmas in (('default', False), ('tuned', True)):
+        result = run_profile(pragmas, args)
+        print(f"  {label:10} {result['throughput']:8.0f} {result['read_p50']:7.1f}ms "
+              f"{result['read_p99']:7.1f}ms {result['write_p50']:8.1f}ms "
+              f"{result['write_p99']:8.1f}ms {result['errors']:7}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: peak memory of buffered vs streamed recipe list responses
+
+Seeds 50,000 recipes, then serializes the last N of them the buffered
+way (a list of to_dict() dicts passed to jsonify, as /recipes/api/filter
+does for one page) and through the stream=json and stream=ndjson paths
+of /recipes/api/filter and /recipes/api/search. Peak Python allocations
+are measured with tracemalloc; streamed peaks should stay about the
+same at every size.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from flask import jsonify
+from bench.common import create_bench_app, seed_dataset
+from models import db
+from routes.recipes import filter_page
+from utils.search import iter_search_results
+
+def measure(run):
+    """
+    Run a function under tracemalloc
+    
+    Returns:
+        Tuple of (peak bytes allocated, milliseconds, bytes returned by run)
+    """
+    db.session.remove()
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = run()
+    elapsed = (time.perf_counter() - start) * 1000
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    db.session.remove()
+    return peak, elapsed, size
+
+def streamed_size(client, url):
+    """Read a streamed response chunk by chunk, as a server would send it"""
+    response = client.get(url, buffered=False)
+    size = sum(len(chunk) for chunk in response.response)
+    response.close()
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--recipes', type=int, default=50000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 20000, 50000],
+                        help='Numbers of recipes to serialize')
+    parser.add_argument('--query', default='bowl', help='Search query for the search rows')
+    args = parser.parse_args()
+    
+    app = create_bench_app()
+    client = app.test_client()
+    with app.app_context():
+        seed_dataset(recipes=args.recipes, users=1, days=1)
+    
+    rows = []
+    with app.app_context():
+        for size in sorted({min(size, args.recipes) for size in args.sizes}):
+            after = args.recipes - size
+            
+            def buffered():
+                with app.test_request_context():
+                    return len(jsonify(filter_page(after=after, limit=size)).get_data())
+            
+            rows.append(('filter, buffered', size, measure(buffered)))
+            for stream_format in ('json', 'ndjson'):
+                url = f'/recipes/api/filter?stream={stream_format}&after={after}'
+                rows.append((f'filter, stream={stream_format}', size,
+                             measure(lambda: streamed_size(client, url))))
+        
+        def buffered_search():
+            with app.test_request_context():
+                recipes = [recipe.to_dict() for recipe in iter_search_results(args.query)]
+                return len(jsonify({'recipes': recipes}).get_data())
+        
+        matches = sum(1 for _ in iter_search_results(args.query))
+        url = f'/recipes/api/search?q={args.query}&stream=json'
+        rows.append((f'search "{args.query}", buffered', matches, measure(buffered_search)))
+        rows.append((f'search "{args.query}", stream=json', matches,
+                     measure(lambda: streamed_size(client, url))))
+    
+    print(f"Peak Python memory serializing recipe lists ({args.recipes} recipes seeded)")
+    print(f"  {'':34} {'recipes':>8} {'peak MiB':>9} {'ms':>9} {'body MiB':>9}")
+    for label, count, (peak, elapsed, size) in rows:
+        print(f"  {label:34} {count:8} {peak / 2**20:9.1f} {elapsed:9.0f} {size / 2**20:9.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Flask CLI commands for EATR Health App
+
+Run with e.g.:
+    flask --app app rebuild-nutrition
+"""
+import time
+import click
+from models.daily_nutrition import DailyNutrition
+from utils.images import available_formats, build_thumbnails
+from utils.recipe_import import FORMATS, detect_format, import_recipes
+
+def register_commands(app):
+    """Register CLI commands on the app"""
+    
+    @app.cli.command('rebuild-nutrition')
+    def rebuild_nutrition():
+        """Recompute the daily_nutrition rollup from meal_plans."""
+        rows = DailyNutrition.rebuild()
+        click.echo(f"Rebuilt {rows} daily nutrition rows")
+    
+    @app.cli.command('dedupe-meal-plans')
+    def dedupe_meal_plans():
+        """Keep the latest meal per slot, backing the others up to meal_plans_duplicates."""
+        from utils.migrations import DUPLICATE_MEALS_TABLE, remove_duplicate_meal_slots
+        removed = remove_duplicate_meal_slots()
+        click.echo(f"Moved {removed} duplicate meals to {DUPLICATE_MEALS_TABLE}")
+    
+    @app.cli.command('build-snapshot')
+    @click.argument('path', default='snapshot.db', type=click.Path(dir_okay=False))
+    def build_snapshot_command(path):
+        """Build the read-only seeded SQLite snapshot used for serverless."""
+        from utils.snapshot import build_snapshot
+        size = build_snapshot(path)
+        click.echo(f"Built snapshot {path} ({size / 1024:.0f} KiB)")
+    
+    @app.cli.command('import-recipes')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'file_format', type=click.Choice(FORMATS),
+                  help='Input format (default: from the file extension).')
+    @click.option('--batch-size', default=1000, show_default=True,
+                  help='Rows per INSERT and commit.')
+    @click.option('--resume/--no-resume', default=True, show_default=True,
+                  help='Skip rows committed by an interrupted earlier run.')
+    @click.option('--thumbnails/--no-thumbnails', default=True, show_default=True,
+                  help='Build thumbnails for imported images under static/.')
+    def import_recipes_command(path, file_format, batch_size, resume, thumbnails):
+        """Bulk-import recipes from a CSV or JSONL file."""
+        if not file_format:
+            try:
+                file_format = detect_format(path)
+            except ValueError as e:
+                raise click.BadParameter(str(e), param_hint="'--format'")
+        stats = import_recipes(path, file_format, batch_size, resume, report=click.echo)
+        
+        for error in stats.errors[:20]:
+            click.echo(f"  skipped {error}", err=True)
+        if len(stats.errors) > 20:
+            click.echo(f"  ... and {len(stats.errors) - 20} more", err=True)
+        
+        click.echo(f"Imported {stats.imported} recipes, skipped {stats.invalid} invalid rows "
+                   f"in {stats.elapsed:.1f}s ({stats.rows_per_second:.0f} rows/sec)")
+        
+        if thumbnails and stats.image_urls:
+            built, _ = build_thumbnails(app.static_folder, app.config['THUMBNAIL_WIDTHS'], urls=stats.image_urls)
+            click.echo(f"Built thumbnails for {built} images")
+    
+    @app.cli.command('build-thumbnails')
+    @click.option('--workers', type=int, help='Worker processes (default: CPU count).')
+    @click.option('--force', is_flag=True, help='Rebuild images that are up to date.')
+    def build_thumbnails_command(workers, force):
+        """Generate responsive WebP/AVIF thumbnails for static/images."""
+        started = time.perf_counter()
+        built, skipped = build_thumbnails(
+            app.static_folder, app.config['THUMBNAIL_WIDTHS'], workers=workers, force=force
+        )
+        formats = ', '.join(available_formats()) or 'no formats'
+        click.echo(f"Built thumbnails ({formats}) for {built} images, {skipped} up to date, "
+                   f"in {time.perf_counter() - started:.1f}s")
+    
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Fingerprint and precompress static files (run after build-thumbnails)."""
+        from utils.assets import build_assets
+        from utils.compression import available_encodings
+        assets, compressed, removed = build_assets(app.static_folder)
+        click.echo(f"Fingerprinted {assets} static files, wrote {compressed} "
+                   f"{'/'.join(available_encodings())} files, removed {removed} stale files")
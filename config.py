@@ -3,6 +3,13 @@ Configuration settings for EATR Health App
 """
 import os
 
+def normalize_database_url(url):
+    """Pin the psycopg2 driver from requirements.txt for plain postgres URLs"""
+    for scheme in ('postgres://', 'postgresql://'):
+        if url and url.startswith(scheme):
+            return 'postgresql+psycopg2://' + url[len(scheme):]
+    return url
+
 class Config:
     """Base configuration"""
     # Secret key for session management
@@ -11,16 +18,106 @@ class Config:
     # Database configuration
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
     
-    # Use in-memory SQLite on Vercel, file-based SQLite locally
-    if os.environ.get('VERCEL'):
+    # Shared network database (PostgreSQL), e.g. from Vercel Postgres or
+    # Neon, so every instance sees the same data
+    DATABASE_URL = normalize_database_url(os.environ.get('DATABASE_URL') or os.environ.get('POSTGRES_URL'))
+    
+    # Prebuilt read-only snapshot (flask build-snapshot), opt-in: writes
+    # to a snapshot get 503, so it is only used when DATABASE_SNAPSHOT
+    # names the file (relative paths are from the project root)
+    DATABASE_SNAPSHOT = os.environ.get('DATABASE_SNAPSHOT')
+    if DATABASE_SNAPSHOT:
+        DATABASE_SNAPSHOT = os.path.join(BASE_DIR, DATABASE_SNAPSHOT)
+        if not os.path.exists(DATABASE_SNAPSHOT):
+            DATABASE_SNAPSHOT = None
+    
+    # Open the snapshot if there is one, then the network database, then
+    # fall back to in-memory SQLite on Vercel and file-based SQLite locally
+    if DATABASE_SNAPSHOT:
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///file:' + os.path.abspath(DATABASE_SNAPSHOT) + \
+            '?mode=ro&immutable=1&uri=true'
+    elif DATABASE_URL:
+        SQLALCHEMY_DATABASE_URI = DATABASE_URL
+    elif os.environ.get('VERCEL'):
         SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     else:
-        SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
-            'sqlite:///' + os.path.join(BASE_DIR, 'database.db')
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(BASE_DIR, 'database.db')
+    
+    # Connection pool for network databases. Keep pool size plus overflow
+    # times the number of instances below the server's connection limit;
+    # serverless instances serve one request at a time, so default small.
+    if not SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'pool_size': int(os.environ.get('DATABASE_POOL_SIZE', 1 if os.environ.get('VERCEL') else 5)),
+            'max_overflow': int(os.environ.get('DATABASE_MAX_OVERFLOW', 2 if os.environ.get('VERCEL') else 10)),
+            'pool_timeout': int(os.environ.get('DATABASE_POOL_TIMEOUT', 10)),
+            # Drop connections before the server or a proxy closes them
+            'pool_recycle': int(os.environ.get('DATABASE_POOL_RECYCLE', 300)),
+            # Check connections on checkout; frozen instances wake up stale
+            'pool_pre_ping': True,
+            # Reuse the most recent connection so idle extras time out
+            'pool_use_lifo': True
+        }
+    else:
+        SQLALCHEMY_ENGINE_OPTIONS = {}
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # PRAGMAs run on every new SQLite connection (not snapshots). WAL lets
+    # readers carry on while a worker writes, and synchronous=NORMAL only
+    # fsyncs at checkpoints. SQLITE_PRAGMAS=off keeps SQLite's defaults.
+    if os.environ.get('SQLITE_PRAGMAS') == 'off':
+        SQLITE_PRAGMAS = {}
+    else:
+        SQLITE_PRAGMAS = {
+            'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+            'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+            # Milliseconds to wait for another writer before "database is locked"
+            'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+            'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+            # Negative values are KiB: 64 MiB of page cache per connection
+            'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64000))
+        }
+    
+    # Store recipe ingredients/instructions/tags in native JSON columns
+    # instead of TEXT (read when models are imported)
+    RECIPE_NATIVE_JSON = os.environ.get('RECIPE_NATIVE_JSON') == '1'
+    
+    # Response cache for recipe endpoints: 'simple' (in-process LRU),
+    # 'redis' (shared, needs the redis package) or 'none'
+    RESPONSE_CACHE = os.environ.get('RESPONSE_CACHE', 'simple')
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))
+    RESPONSE_CACHE_MAX_ENTRIES = 1024
+    RESPONSE_CACHE_REDIS_URL = os.environ.get('RESPONSE_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    
+    # Widths of the responsive recipe thumbnails (flask build-thumbnails)
+    THUMBNAIL_WIDTHS = (320, 640, 960)
+    
     # Flask configuration
     DEBUG = os.environ.get('FLASK_ENV') != 'production'
     HOST = '0.0.0.0'
     PORT = int(os.environ.get('PORT', 5000))
+    
+    # SQL instrumentation: query count and database time per request in a
+    # Server-Timing header, and a warning logged for slow requests
+    SQL_METRICS = os.environ.get('SQL_METRICS', '1') == '1'
+    SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 500))
+    SLOW_REQUEST_QUERIES = int(os.environ.get('SLOW_REQUEST_QUERIES', 25))
+    # /debug/metrics shows SQL text, so it is off in production by default
+    DEBUG_METRICS = DEBUG or os.environ.get('DEBUG_METRICS') == '1'
+    
+    # Brotli/gzip for text responses of at least COMPRESS_MIN_SIZE bytes
+    COMPRESS_RESPONSES = os.environ.get('COMPRESS_RESPONSES', '1') == '1'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    
+    # Link the hashed copies written by flask build-assets. Off in debug
+    # so edits to static files show up without a rebuild.
+    FINGERPRINT_STATIC = os.environ.get('FINGERPRINT_STATIC', '0' if DEBUG else '1') == '1'
+    
+    # Rendered recipe cards and detail bodies, keyed on each recipe's
+    # version: 'simple', 'redis' or 'none'. Off in debug so template
+    # edits show up without a restart.
+    FRAGMENT_CACHE = os.environ.get('FRAGMENT_CACHE', 'none' if DEBUG else RESPONSE_CACHE)
+    FRAGMENT_CACHE_TTL = int(os.environ.get('FRAGMENT_CACHE_TTL', 24 * 60 * 60))
+    FRAGMENT_CACHE_MAX_ENTRIES = 20000
+    FRAGMENT_CACHE_REDIS_URL = RESPONSE_CACHE_REDIS_URL
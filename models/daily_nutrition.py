@@ -0,0 +1,123 @@
+"""
+Daily nutrition rollup database model
+"""
+from models import db
+from models.meal_plan import MealPlan, upsert_insert
+from models.recipe import Recipe
+from sqlalchemy import func
+
+class DailyNutrition(db.Model):
+    """Per-user daily nutrition totals, kept in sync with meal_plans"""
+    __tablename__ = 'daily_nutrition'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    
+    calories = db.Column(db.Float, nullable=False, default=0)
+    protein = db.Column(db.Float, nullable=False, default=0)  # in grams
+    carbs = db.Column(db.Float, nullable=False, default=0)  # in grams
+    fats = db.Column(db.Float, nullable=False, default=0)  # in grams
+    meal_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    @staticmethod
+    def totals_select(period=MealPlan.date):
+        """
+        Aggregate meal_plans joined to recipes per (user, period)
+        
+        Args:
+            period: SQL expression grouping meal dates (default: the day)
+        """
+        return db.select(
+            MealPlan.user_id,
+            period.label('date'),
+            func.sum(Recipe.calories).label('calories'),
+            func.sum(func.coalesce(Recipe.protein, 0)).label('protein'),
+            func.sum(func.coalesce(Recipe.carbs, 0)).label('carbs'),
+            func.sum(func.coalesce(Recipe.fats, 0)).label('fats'),
+            func.count(MealPlan.id).label('meal_count')
+        ).join(
+            Recipe, Recipe.id == MealPlan.recipe_id
+        ).group_by(MealPlan.user_id, period)
+    
+    @classmethod
+    def refresh(cls, user_id, date):
+        """
+        Recompute the rollup row for one day after its meals changed.
+        Runs in the caller's transaction; the caller commits.
+        """
+        cls.refresh_days(user_id, [date])
+    
+    @classmethod
+    def refresh_days(cls, user_id, dates):
+        """
+        Recompute the rollup rows for several days of one user with one
+        aggregate query and one multi-row upsert
+        """
+        dates = set(dates)
+        if not dates:
+            return
+        
+        db.session.flush()
+        totals = db.session.execute(
+            cls.totals_select().where(
+                MealPlan.user_id == user_id,
+                MealPlan.date.in_(dates)
+            )
+        ).mappings().all()
+        
+        empty_dates = dates - {row['date'] for row in totals}
+        if empty_dates:
+            cls.query.filter(
+                cls.user_id == user_id,
+                cls.date.in_(empty_dates)
+            ).delete(synchronize_session=False)
+        
+        if not totals:
+            return
+        
+        insert = upsert_insert()
+        stmt = insert(cls).values([dict(row) for row in totals])
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=['user_id', 'date'],
+            set_={
+                column: stmt.excluded[column]
+                for column in ('calories', 'protein', 'carbs', 'fats', 'meal_count')
+            }
+        ))
+    
+    @classmethod
+    def rebuild(cls):
+        """
+        Recompute every rollup row from meal_plans
+        
+        Returns:
+            Number of rows written
+        """
+        cls.query.delete()
+        totals = cls.totals_select().subquery()
+        db.session.execute(db.insert(cls).from_select(
+            ['user_id', 'date', 'calories', 'protein', 'carbs', 'fats', 'meal_count'],
+            db.select(totals)
+        ))
+        db.session.commit()
+        return cls.query.count()
+    
+    @classmethod
+    def totals_for(cls, user_id, date):
+        """Get the totals dictionary for one day (zeros if nothing logged)"""
+        row = db.session.get(cls, (user_id, date))
+        if not row:
+            return {'calories': 0, 'protein': 0, 'carbs': 0, 'fats': 0}
+        return row.to_dict()
+    
+    def to_dict(self):
+        """Convert rollup row to a totals dictionary"""
+        return {
+            'calories': self.calories,
+            'protein': self.protein,
+            'carbs': self.carbs,
+            'fats': self.fats
+        }
+    
+    def __repr__(self):
+        return f'<DailyNutrition {self.user_id} on {self.date}>'
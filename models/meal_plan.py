@@ -1,12 +1,37 @@
 """
 Meal Plan database model
 """
+import importlib
 from models import db
 from datetime import datetime
 
+# Dialects whose INSERT construct supports ON CONFLICT
+UPSERT_DIALECTS = ('sqlite', 'postgresql')
+
+def upsert_insert():
+    """
+    The INSERT construct with ON CONFLICT support for the app's database
+    
+    The dialect module is imported on first use: loading the PostgreSQL
+    dialect takes about as long as the rest of the models together, and
+    SQLite deployments never need it.
+    """
+    name = db.engine.dialect.name
+    if name not in UPSERT_DIALECTS:
+        raise NotImplementedError(f'Upserts are not supported on {name}')
+    return importlib.import_module(f'sqlalchemy.dialects.{name}').insert
+
+# Slots available on each day of the plan
+MEAL_TYPES = ('breakfast', 'lunch', 'dinner')
+
 class MealPlan(db.Model):
     """Meal plan model for tracking planned meals"""
     __tablename__ = 'meal_plans'
+    __table_args__ = (
+        # One meal per slot; also serves (user_id) and (user_id, date) lookups
+        db.Index('uq_meal_plans_user_date_meal', 'user_id', 'date', 'meal_type', unique=True),
+        db.Index('ix_meal_plans_recipe_id', 'recipe_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -17,6 +42,58 @@ class MealPlan(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    @classmethod
+    def upsert(cls, user_id, recipe_id, date, meal_type, replace=True):
+        """
+        Put a recipe in a (user, date, meal_type) slot with a single
+        INSERT ... ON CONFLICT statement
+        
+        Args:
+            replace: Replace a meal already in the slot; if False, an
+                occupied slot is left unchanged
+        
+        Returns:
+            The MealPlan occupying the slot, or None if replace is False
+            and the slot was already taken
+        """
+        insert = upsert_insert()
+        stmt = insert(cls).values(
+            user_id=user_id,
+            recipe_id=recipe_id,
+            date=date,
+            meal_type=meal_type
+        )
+        if replace:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['user_id', 'date', 'meal_type'],
+                set_={'recipe_id': stmt.excluded.recipe_id}
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=['user_id', 'date', 'meal_type'])
+        
+        return db.session.scalars(
+            stmt.returning(cls), execution_options={'populate_existing': True}
+        ).one_or_none()
+    
+    @classmethod
+    def upsert_many(cls, rows):
+        """
+        Fill many slots with one multi-row INSERT ... ON CONFLICT statement
+        
+        Args:
+            rows: Dictionaries with user_id, recipe_id, date and meal_type;
+                each slot may appear at most once
+        """
+        if not rows:
+            return
+        insert = upsert_insert()
+        created_at = datetime.utcnow()
+        stmt = insert(cls).values([dict(row, created_at=created_at) for row in rows])
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=['user_id', 'date', 'meal_type'],
+            set_={'recipe_id': stmt.excluded.recipe_id}
+        ))
+    
     def to_dict(self):
         """Convert meal plan to dictionary"""
         return {
@@ -2,8 +2,37 @@
 Recipe database model
 """
 from models import db
+from models.tag import Tag, recipe_tags
+from config import Config
+from sqlalchemy import event, literal_column
+from sqlalchemy.orm import load_only
 import json
 
+# Column type for the JSON fields, fixed when the model is imported.
+# Both store JSON text, so existing databases work with either setting.
+JSON_COLUMN_TYPE = db.JSON if Config.RECIPE_NATIVE_JSON else db.Text
+
+JSON_FIELDS = ('ingredients_json', 'instructions_json', 'tags_json')
+
+# Fields returned by to_dict(), in output order
+API_FIELDS = (
+    'id', 'name', 'description', 'image_url', 'category',
+    'prep_time', 'cook_time', 'total_time', 'servings',
+    'calories', 'protein', 'carbs', 'fats', 'fiber',
+    'ingredients', 'instructions', 'tags'
+)
+
+# Columns behind fields that are not plain columns
+FIELD_COLUMNS = {
+    'total_time': ('prep_time', 'cook_time'),
+    'ingredients': ('ingredients_json',),
+    'instructions': ('instructions_json',),
+    'tags': ('tags_json',)
+}
+
+# Display order for meal categories
+CATEGORY_ORDER = ['Breakfast', 'Lunch', 'Dinner', 'Snacks']
+
 class Recipe(db.Model):
     """Recipe model for storing recipe information"""
     __tablename__ = 'recipes'
@@ -12,7 +41,7 @@ class Recipe(db.Model):
     name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
     image_url = db.Column(db.String(500))
-    category = db.Column(db.String(50))  # Breakfast, Lunch, Dinner, Snacks
+    category = db.Column(db.String(50), index=True)  # Breakfast, Lunch, Dinner, Snacks
     prep_time = db.Column(db.Integer)  # in minutes
     cook_time = db.Column(db.Integer)  # in minutes
     servings = db.Column(db.Integer, default=1)
@@ -24,76 +53,128 @@ class Recipe(db.Model):
     fats = db.Column(db.Float)  # in grams
     fiber = db.Column(db.Float)  # in grams
     
-    # JSON fields
-    ingredients_json = db.Column(db.Text)  # Stored as JSON string
-    instructions_json = db.Column(db.Text)  # Stored as JSON string
-    tags_json = db.Column(db.Text)  # Stored as JSON string
+    # JSON fields (parsed values are cached per instance, see parsed_json)
+    ingredients_json = db.Column(JSON_COLUMN_TYPE)  # Stored as JSON string
+    instructions_json = db.Column(JSON_COLUMN_TYPE)  # Stored as JSON string
+    tags_json = db.Column(JSON_COLUMN_TYPE)  # Stored as JSON string
+    
+    # Incremented by every UPDATE of the row; keys cached rendered markup
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1',
+                        onupdate=literal_column('version + 1'))
     
     # Relationships
     meal_plans = db.relationship('MealPlan', backref='recipe', lazy=True)
+    tag_links = db.relationship('Tag', secondary=recipe_tags, lazy=True)
+    
+    def parsed_json(self, column):
+        """
+        Get the decoded value of a JSON column, parsing it at most once
+        
+        The cache lives in the instance __dict__ and is cleared whenever the
+        column is assigned or the instance is loaded, refreshed or expired.
+        Callers must not mutate the returned list.
+        """
+        cache = self.__dict__.get('_parsed_json')
+        if cache is not None and column in cache:
+            return cache[column]
+        
+        value = decode_json_field(getattr(self, column))
+        self.__dict__.setdefault('_parsed_json', {})[column] = value
+        return value
     
     @property
     def ingredients(self):
         """Get ingredients as Python list"""
-        if self.ingredients_json:
-            return json.loads(self.ingredients_json)
-        return []
+        return self.parsed_json('ingredients_json')
     
     @ingredients.setter
     def ingredients(self, value):
         """Set ingredients from Python list"""
-        self.ingredients_json = json.dumps(value)
+        self.ingredients_json = encode_json_field(value)
     
     @property
     def instructions(self):
         """Get instructions as Python list"""
-        if self.instructions_json:
-            return json.loads(self.instructions_json)
-        return []
+        return self.parsed_json('instructions_json')
     
     @instructions.setter
     def instructions(self, value):
         """Set instructions from Python list"""
-        self.instructions_json = json.dumps(value)
+        self.instructions_json = encode_json_field(value)
     
     @property
     def tags(self):
         """Get tags as Python list"""
-        if self.tags_json:
-            return json.loads(self.tags_json)
-        return []
+        return self.parsed_json('tags_json')
     
     @tags.setter
     def tags(self, value):
-        """Set tags from Python list"""
-        self.tags_json = json.dumps(value)
+        """Set tags from Python list, keeping the tag index in sync"""
+        self.tags_json = encode_json_field(value)
+        self.tag_links = [Tag.get_or_create(name) for name in dict.fromkeys(value)]
+    
+    @staticmethod
+    def category_names():
+        """Get categories in use, in meal order"""
+        categories = db.session.scalars(
+            db.select(Recipe.category).distinct().where(Recipe.category.isnot(None))
+        ).all()
+        return sorted(categories, key=lambda c: (
+            CATEGORY_ORDER.index(c) if c in CATEGORY_ORDER else len(CATEGORY_ORDER), c
+        ))
     
     @property
     def total_time(self):
         """Calculate total cooking time"""
         return (self.prep_time or 0) + (self.cook_time or 0)
     
-    def to_dict(self):
-        """Convert recipe to dictionary for JSON serialization"""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'image_url': self.image_url,
-            'category': self.category,
-            'prep_time': self.prep_time,
-            'cook_time': self.cook_time,
-            'total_time': self.total_time,
-            'servings': self.servings,
-            'calories': self.calories,
-            'protein': self.protein,
-            'carbs': self.carbs,
-            'fats': self.fats,
-            'fiber': self.fiber,
-            'ingredients': self.ingredients,
-            'instructions': self.instructions,
-            'tags': self.tags
-        }
+    @staticmethod
+    def load_only_fields(fields):
+        """
+        Build a loader option that selects only the columns needed to
+        serialize the given to_dict() fields
+        """
+        columns = {'id'}
+        for field in fields:
+            columns.update(FIELD_COLUMNS.get(field, (field,)))
+        return load_only(*(getattr(Recipe, column) for column in sorted(columns)))
+    
+    def to_dict(self, fields=API_FIELDS):
+        """
+        Convert recipe to dictionary for JSON serialization
+        
+        Args:
+            fields: Subset of API_FIELDS to include (default: all)
+        """
+        return {field: getattr(self, field) for field in fields}
     
     def __repr__(self):
         return f'<Recipe {self.name}>'
+
+def encode_json_field(value):
+    """Convert a Python list to the stored form of a JSON column"""
+    return value if Config.RECIPE_NATIVE_JSON else json.dumps(value)
+
+def decode_json_field(raw):
+    """Convert a stored JSON column value (text or native) to a Python list"""
+    if not raw:
+        return []
+    if isinstance(raw, str):
+        return json.loads(raw)
+    return raw
+
+def clear_parsed_json(target, *args):
+    """Drop all cached JSON values when an instance is (re)loaded or expired"""
+    target.__dict__.pop('_parsed_json', None)
+
+for event_name in ('load', 'refresh', 'expire'):
+    event.listen(Recipe, event_name, clear_parsed_json)
+
+def make_json_field_listener(column):
+    """Drop the cached value of one JSON column when it is assigned"""
+    def on_set(target, value, oldvalue, initiator):
+        target.__dict__.get('_parsed_json', {}).pop(column, None)
+    return on_set
+
+for column in JSON_FIELDS:
+    event.listen(getattr(Recipe, column), 'set', make_json_field_listener(column))
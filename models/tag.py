@@ -0,0 +1,109 @@
+"""
+Tag database model
+"""
+from models import db
+from sqlalchemy import func, insert
+
+# Association table between recipes and tags.
+# The primary key serves recipe -> tags, the index serves tag -> recipes.
+recipe_tags = db.Table(
+    'recipe_tags',
+    db.Column('recipe_id', db.Integer, db.ForeignKey('recipes.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_recipe_tags_tag_recipe', 'tag_id', 'recipe_id')
+)
+
+class Tag(db.Model):
+    """Tag model for dietary and descriptive recipe labels"""
+    __tablename__ = 'tags'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    
+    @classmethod
+    def get_or_create(cls, name):
+        """Get a tag by exact name, adding it to the session if new"""
+        tag = cls.query.filter_by(name=name).first()
+        if not tag:
+            tag = cls(name=name)
+            db.session.add(tag)
+        return tag
+    
+    @staticmethod
+    def ids_for_names(names):
+        """
+        Get tag ids by name, bulk-inserting tags that do not exist yet
+        
+        Returns:
+            Dictionary of tag name -> id
+        """
+        names = sorted(set(names))
+        if not names:
+            return {}
+        
+        def lookup():
+            return dict(db.session.execute(
+                db.select(Tag.name, Tag.id).where(Tag.name.in_(names))
+            ).all())
+        
+        tag_ids = lookup()
+        new_names = [name for name in names if name not in tag_ids]
+        if new_names:
+            db.session.execute(insert(Tag), [{'name': name} for name in new_names])
+            tag_ids = lookup()
+        return tag_ids
+    
+    @staticmethod
+    def link_recipes(recipe_tag_names):
+        """
+        Bulk-insert recipe_tags rows for recipes that have no tags yet
+        
+        Args:
+            recipe_tag_names: Iterable of (recipe_id, list of tag names)
+        
+        Returns:
+            Number of links inserted
+        """
+        recipe_tag_names = list(recipe_tag_names)
+        tag_ids = Tag.ids_for_names(name for _, names in recipe_tag_names for name in names)
+        links = [
+            {'recipe_id': recipe_id, 'tag_id': tag_ids[name]}
+            for recipe_id, names in recipe_tag_names
+            for name in dict.fromkeys(names)
+        ]
+        if links:
+            db.session.execute(insert(recipe_tags), links)
+        return len(links)
+    
+    @staticmethod
+    def recipe_ids_with_all(names):
+        """
+        Build a subquery of recipe ids tagged with every given tag
+        
+        Args:
+            names: Iterable of exact tag names
+        
+        Returns:
+            Select of recipe ids, usable with Recipe.id.in_()
+        """
+        names = set(names)
+        return db.select(recipe_tags.c.recipe_id).join(
+            Tag, Tag.id == recipe_tags.c.tag_id
+        ).where(
+            Tag.name.in_(names)
+        ).group_by(
+            recipe_tags.c.recipe_id
+        ).having(func.count() == len(names))
+    
+    @staticmethod
+    def facet_names():
+        """Get names of tags in use, most common first"""
+        usage = func.count(recipe_tags.c.recipe_id)
+        return db.session.scalars(
+            db.select(Tag.name).join(
+                recipe_tags, recipe_tags.c.tag_id == Tag.id
+            ).group_by(Tag.id).order_by(usage.desc(), Tag.name)
+        ).all()
+    
+    def __repr__(self):
+        return f'<Tag {self.name}>'
@@ -0,0 +1,28 @@
+"""
+Diagnostics routes
+"""
+from flask import Blueprint, abort, current_app, jsonify
+
+debug_bp = Blueprint('debug', __name__, url_prefix='/debug')
+
+@debug_bp.before_request
+def require_debug_metrics():
+    """Hide diagnostics unless DEBUG_METRICS is enabled"""
+    if not current_app.config.get('DEBUG_METRICS'):
+        abort(404)
+
+@debug_bp.route('/metrics')
+def metrics():
+    """Per-endpoint request and SQL totals and fragment cache hits for this process (JSON)"""
+    registry = current_app.extensions['sql_metrics']
+    fragments = dict(current_app.extensions['fragment_stats'].to_dict(),
+                     backend=current_app.config.get('FRAGMENT_CACHE'))
+    return jsonify(dict(registry.to_dict(), enabled=current_app.config.get('SQL_METRICS', False),
+                        fragment_cache=fragments))
+
+@debug_bp.route('/metrics', methods=['DELETE'])
+def reset_metrics():
+    """Start counting again from zero"""
+    current_app.extensions['sql_metrics'].reset()
+    current_app.extensions['fragment_stats'].reset()
+    return jsonify({'success': True})
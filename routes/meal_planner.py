@@ -1,25 +1,44 @@
 """
 Meal planner routes
 """
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, render_template, jsonify, request, abort, url_for
+from sqlalchemy.orm import joinedload
 from models import db
-from models.user import User
-from models.meal_plan import MealPlan
+from models.meal_plan import MealPlan, MEAL_TYPES
+from models.daily_nutrition import DailyNutrition
 from models.recipe import Recipe
+from routes.recipes import filter_page
+from utils.current_user import current_user_profile
 from datetime import datetime, timedelta
 
+# Largest number of operations accepted by /api/batch
+MAX_BATCH_OPERATIONS = 200
+
+# Longest plan accepted by /api/generate
+MAX_GENERATE_DAYS = 28
+
+# Recipes per page in the planner's recipe selector, and the fields it shows
+RECIPE_SELECTOR_PAGE = 48
+RECIPE_SELECTOR_FIELDS = ('id', 'name', 'image_url', 'calories')
+
 meal_planner_bp = Blueprint('meal_planner', __name__, url_prefix='/meal-planner')
 
 @meal_planner_bp.route('/')
 def planner():
     """Weekly meal planner view"""
-    user = User.query.first()
+    user = current_user_profile()
     if not user:
-        user = User(username='demo_user')
-        db.session.add(user)
-        db.session.commit()
+        abort(404)
     
-    return render_template('meal_planner/planner.html', user=user)
+    # Embed the week and the selector's first page so the page needs no API calls
+    today = datetime.utcnow().date()
+    week = build_week(user['id'], today - timedelta(days=today.weekday()))
+    recipes = filter_page(limit=RECIPE_SELECTOR_PAGE, fields=RECIPE_SELECTOR_FIELDS)
+    # Later selector pages are fetched with the same fields and size
+    recipes_url = url_for('recipes.filter_recipes', fields=','.join(RECIPE_SELECTOR_FIELDS),
+                          limit=RECIPE_SELECTOR_PAGE)
+    return render_template('meal_planner/planner.html', user=user, week=week,
+                           recipes=recipes, recipes_url=recipes_url)
 
 @meal_planner_bp.route('/api/add', methods=['POST'])
 def add_to_plan():
@@ -32,53 +51,291 @@ def add_to_plan():
     # Parse date
     date = datetime.strptime(date_str, '%Y-%m-%d').date()
     
-    # Get default user
-    user = User.query.first()
+    # Get current user
+    user = current_user_profile()
+    if not user:
+        return jsonify({'error': 'No user found'}), 404
     
-    # Check if meal already exists for this slot
-    existing = MealPlan.query.filter_by(
-        user_id=user.id,
+    # Insert or replace the meal in this slot
+    meal_plan = MealPlan.upsert(
+        user_id=user['id'],
+        recipe_id=recipe_id,
         date=date,
         meal_type=meal_type
-    ).first()
+    )
+    DailyNutrition.refresh(user['id'], date)
+    db.session.commit()
     
-    if existing:
-        # Update existing
-        existing.recipe_id = recipe_id
-        db.session.commit()
-        return jsonify({
-            'success': True,
-            'meal_plan': existing.to_dict()
-        })
-    else:
-        # Create new
-        meal_plan = MealPlan(
-            user_id=user.id,
-            recipe_id=recipe_id,
-            date=date,
-            meal_type=meal_type
-        )
-        db.session.add(meal_plan)
-        db.session.commit()
-        
-        return jsonify({
-            'success': True,
-            'meal_plan': meal_plan.to_dict()
-        })
+    return jsonify({
+        'success': True,
+        'meal_plan': meal_plan.to_dict()
+    })
 
 @meal_planner_bp.route('/api/remove/<int:meal_plan_id>', methods=['DELETE'])
 def remove_from_plan(meal_plan_id):
     """Remove meal from plan"""
-    meal_plan = MealPlan.query.get_or_404(meal_plan_id)
+    user = current_user_profile()
+    if not user:
+        return jsonify({'error': 'No user found'}), 404
+    
+    meal_plan = MealPlan.query.filter_by(
+        id=meal_plan_id,
+        user_id=user['id']
+    ).first_or_404()
+    user_id, date = meal_plan.user_id, meal_plan.date
     db.session.delete(meal_plan)
+    DailyNutrition.refresh(user_id, date)
     db.session.commit()
     
     return jsonify({'success': True})
 
+@meal_planner_bp.route('/api/batch', methods=['POST'])
+def batch_update():
+    """
+    Apply many meal plan changes in one transaction
+    
+    Body: {"operations": [...], "week_start": "YYYY-MM-DD" (optional)}
+    Each operation is one of:
+        {"op": "add", "date": ..., "meal_type": ..., "recipe_id": ...}
+            fill a slot, replacing any meal already there (like /api/add)
+        {"op": "replace", "date": ..., "meal_type": ..., "recipe_id": ...}
+            change the recipe in a slot that already has a meal
+        {"op": "remove", "id": ...} or {"op": "remove", "date": ..., "meal_type": ...}
+            empty a slot
+    
+    Operations apply in order. If any operation is invalid, nothing is
+    applied and the errors are returned with their operation index.
+    On success the week containing week_start (default: this week) is
+    returned in the /api/week format.
+    """
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'success': False, 'error': 'operations must be a non-empty list'}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({
+            'success': False,
+            'error': f'At most {MAX_BATCH_OPERATIONS} operations per batch'
+        }), 400
+    
+    try:
+        week_start = parse_date(data['week_start']) if data.get('week_start') \
+            else datetime.utcnow().date()
+    except ValueError:
+        return jsonify({'success': False, 'error': 'week_start must be YYYY-MM-DD'}), 400
+    
+    user = current_user_profile()
+    if not user:
+        return jsonify({'error': 'No user found'}), 404
+    
+    changes, errors = resolve_operations(user['id'], operations)
+    if errors:
+        return jsonify({'success': False, 'errors': errors}), 400
+    
+    upserts, removed_ids = changes
+    MealPlan.upsert_many(upserts)
+    if removed_ids:
+        MealPlan.query.filter(MealPlan.id.in_(removed_ids)).delete(synchronize_session=False)
+    
+    changed_dates = {row['date'] for row in upserts} | set(removed_ids.values())
+    DailyNutrition.refresh_days(user['id'], changed_dates)
+    db.session.commit()
+    
+    week = build_week(user['id'], week_start - timedelta(days=week_start.weekday()))
+    return jsonify(dict(week, success=True, applied=len(operations)))
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD string, raising ValueError if malformed"""
+    if not isinstance(value, str):
+        raise ValueError(value)
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def resolve_operations(user_id, operations):
+    """
+    Validate batch operations against the current plan and reduce them
+    to the final change per slot
+    
+    Returns:
+        Tuple of ((upsert rows, {removed meal id: date}), errors)
+    """
+    errors = []
+    parsed = []
+    recipe_ids = set()
+    meal_ids = set()
+    dates = set()
+    
+    # Check the shape of every operation
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            errors.append({'index': index, 'error': 'Operation must be an object'})
+            continue
+        
+        op = operation.get('op')
+        if op not in ('add', 'replace', 'remove'):
+            errors.append({'index': index, 'error': "op must be 'add', 'replace' or 'remove'"})
+            continue
+        
+        if op == 'remove' and 'id' in operation:
+            if not isinstance(operation['id'], int):
+                errors.append({'index': index, 'error': 'id must be an integer'})
+                continue
+            meal_ids.add(operation['id'])
+            parsed.append((index, op, operation['id'], None))
+            continue
+        
+        try:
+            date = parse_date(operation.get('date'))
+        except ValueError:
+            errors.append({'index': index, 'error': 'date must be YYYY-MM-DD'})
+            continue
+        meal_type = operation.get('meal_type')
+        if meal_type not in MEAL_TYPES:
+            errors.append({'index': index, 'error': f"meal_type must be one of: {', '.join(MEAL_TYPES)}"})
+            continue
+        
+        recipe_id = None
+        if op != 'remove':
+            recipe_id = operation.get('recipe_id')
+            if not isinstance(recipe_id, int):
+                errors.append({'index': index, 'error': 'recipe_id must be an integer'})
+                continue
+            recipe_ids.add(recipe_id)
+        
+        dates.add(date)
+        parsed.append((index, op, (date, meal_type), recipe_id))
+    
+    if errors:
+        return None, errors
+    
+    # Load the affected slots and recipes in one query each
+    existing = MealPlan.query.filter(
+        MealPlan.user_id == user_id,
+        MealPlan.date.in_(dates) | MealPlan.id.in_(meal_ids)
+    ).all()
+    slot_ids = {(meal.date, meal.meal_type): meal.id for meal in existing}
+    id_slots = {meal.id: (meal.date, meal.meal_type) for meal in existing}
+    original = {(meal.date, meal.meal_type): meal.recipe_id for meal in existing}
+    known_recipes = set(db.session.scalars(
+        db.select(Recipe.id).where(Recipe.id.in_(recipe_ids))
+    ))
+    
+    # Replay the operations over the current plan
+    state = dict(original)
+    for index, op, target, recipe_id in parsed:
+        slot = id_slots.get(target) if isinstance(target, int) else target
+        
+        if slot is None:
+            errors.append({'index': index, 'error': f'Meal plan {target} not found'})
+        elif op != 'add' and state.get(slot) is None:
+            errors.append({'index': index, 'error': f'No meal planned for {slot[1]} on {slot[0].isoformat()}'})
+        elif recipe_id is not None and recipe_id not in known_recipes:
+            errors.append({'index': index, 'error': f'Recipe {recipe_id} not found'})
+        else:
+            state[slot] = recipe_id
+    
+    if errors:
+        return None, errors
+    
+    upserts = [
+        {'user_id': user_id, 'recipe_id': recipe_id, 'date': date, 'meal_type': meal_type}
+        for (date, meal_type), recipe_id in state.items()
+        if recipe_id is not None and original.get((date, meal_type)) != recipe_id
+    ]
+    removed_ids = {
+        slot_ids[slot]: slot[0]
+        for slot, recipe_id in state.items()
+        if recipe_id is None and slot in original
+    }
+    return (upserts, removed_ids), None
+
+@meal_planner_bp.route('/api/generate', methods=['POST'])
+def generate():
+    """
+    Fill breakfast, lunch and dinner for several days with recipes whose
+    daily totals land close to the user's goals
+    
+    Body (all optional): {"start_date": "YYYY-MM-DD" (default today),
+    "days": 1-28 (default 7), "overwrite": false, "seed": int}
+    Without overwrite, meals already planned are kept and counted
+    toward the day's totals.
+    """
+    data = request.get_json(silent=True) or {}
+    days = data.get('days', 7)
+    if not isinstance(days, int) or isinstance(days, bool) or not 1 <= days <= MAX_GENERATE_DAYS:
+        return jsonify({'success': False, 'error': f'days must be between 1 and {MAX_GENERATE_DAYS}'}), 400
+    
+    seed = data.get('seed')
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+        return jsonify({'success': False, 'error': 'seed must be a non-negative integer'}), 400
+    
+    try:
+        start_date = parse_date(data['start_date']) if data.get('start_date') \
+            else datetime.utcnow().date()
+    except ValueError:
+        return jsonify({'success': False, 'error': 'start_date must be YYYY-MM-DD'}), 400
+    
+    user = current_user_profile()
+    if not user:
+        return jsonify({'error': 'No user found'}), 404
+    
+    dates = [start_date + timedelta(days=i) for i in range(days)]
+    fixed = [{} for _ in dates]
+    if not data.get('overwrite'):
+        existing = db.session.execute(db.select(
+            MealPlan.date, MealPlan.meal_type, MealPlan.recipe_id
+        ).where(
+            MealPlan.user_id == user['id'],
+            MealPlan.date >= dates[0],
+            MealPlan.date <= dates[-1]
+        )).all()
+        for date, meal_type, recipe_id in existing:
+            fixed[(date - start_date).days][meal_type] = recipe_id
+    
+    # NumPy-backed helpers are imported on first use to keep cold starts fast
+    from utils.meal_generator import generate_plan
+    from utils.recipe_matrix import NutritionMatrix, get_nutrition_matrix
+    matrix = get_nutrition_matrix()
+    if len(matrix) == 0:
+        return jsonify({'success': False, 'error': 'No recipes available'}), 400
+    
+    goals = {
+        'calories': user['calorie_goal'],
+        'protein': user['protein_goal'],
+        'carbs': user['carbs_goal'],
+        'fats': user['fats_goal']
+    }
+    plan = generate_plan(matrix, goals, days, fixed=fixed, seed=seed)
+    
+    MealPlan.upsert_many([
+        {'user_id': user['id'], 'recipe_id': recipe_id, 'date': date, 'meal_type': meal_type}
+        for date, meals in zip(dates, plan)
+        for meal_type, recipe_id in meals.items()
+    ])
+    DailyNutrition.refresh_days(user['id'], dates)
+    db.session.commit()
+    
+    # Report each day's full plan and totals
+    result = []
+    for date, generated, kept in zip(dates, plan, fixed):
+        meals = dict(kept, **generated)
+        meal_rows = matrix.rows_for_ids(list(meals.values()))
+        totals = matrix.values[meal_rows[meal_rows >= 0]].sum(axis=0)
+        result.append({
+            'date': date.isoformat(),
+            'meals': meals,
+            'generated': sorted(generated),
+            'totals': {
+                name: round(float(totals[NutritionMatrix.COLUMNS.index(name)]), 1)
+                for name in ('calories', 'protein', 'carbs', 'fats')
+            }
+        })
+    
+    return jsonify({'success': True, 'goals': goals, 'plan': result})
+
 @meal_planner_bp.route('/api/week')
 def get_week():
     """Get meal plan for current week"""
-    user = User.query.first()
+    user = current_user_profile()
     if not user:
         return jsonify({'error': 'No user found'}), 404
     
@@ -86,28 +343,48 @@ def get_week():
     today = datetime.utcnow().date()
     start_of_week = today - timedelta(days=today.weekday())
     
-    # Get 7 days starting from Monday
+    return jsonify(build_week(user['id'], start_of_week))
+
+def build_week(user_id, start_of_week):
+    """
+    Build the 7-day plan and daily totals starting from a Monday
+    
+    Returns:
+        Dictionary with week_plan and start_date, as served by /api/week
+    """
+    end_of_week = start_of_week + timedelta(days=6)
+    
+    # Load the whole week in one query, with recipes eager-loaded
+    meals = MealPlan.query.options(joinedload(MealPlan.recipe)).filter(
+        MealPlan.user_id == user_id,
+        MealPlan.date >= start_of_week,
+        MealPlan.date <= end_of_week
+    ).all()
+    
+    meals_by_date = {}
+    for meal in meals:
+        meals_by_date.setdefault(meal.date, []).append(meal)
+    
+    # Build 7 days starting from Monday
     week_plan = {}
     for i in range(7):
         date = start_of_week + timedelta(days=i)
-        meals = MealPlan.query.filter_by(
-            user_id=user.id,
-            date=date
-        ).all()
+        day_meals = meals_by_date.get(date, [])
         
         # Calculate daily totals
-        daily_calories = sum(meal.recipe.calories for meal in meals if meal.recipe)
-        daily_protein = sum(meal.recipe.protein or 0 for meal in meals if meal.recipe)
-        daily_carbs = sum(meal.recipe.carbs or 0 for meal in meals if meal.recipe)
-        daily_fats = sum(meal.recipe.fats or 0 for meal in meals if meal.recipe)
+        recipes = [meal.recipe for meal in day_meals if meal.recipe]
+        daily_calories = sum(recipe.calories for recipe in recipes)
+        daily_protein = sum(recipe.protein or 0 for recipe in recipes)
+        daily_carbs = sum(recipe.carbs or 0 for recipe in recipes)
+        daily_fats = sum(recipe.fats or 0 for recipe in recipes)
         
         week_plan[date.isoformat()] = {
             'date': date.isoformat(),
             'day_name': date.strftime('%A'),
             'meals': {
-                'breakfast': next((m.to_dict() for m in meals if m.meal_type == 'breakfast'), None),
-                'lunch': next((m.to_dict() for m in meals if m.meal_type == 'lunch'), None),
-                'dinner': next((m.to_dict() for m in meals if m.meal_type == 'dinner'), None)
+                'breakfast': next((m.to_dict() for m in day_meals if m.meal_type == 'breakfast'), None),
+                'lunch': next((m.to_dict() for m in day_meals if m.meal_type == 'lunch'), None),
+                'dinner': next((m.to_dict() for m in day_meals if m.meal_type == 'dinner'), None)
             },
             'totals': {
                 'calories': daily_calories,
@@ -117,7 +394,7 @@ def get_week():
             }
         }
     
-    return jsonify({
+    return {
         'week_plan': week_plan,
         'start_date': start_of_week.isoformat()
-    })
+    }
@@ -1,46 +1,71 @@
 """
 Nutrition tracking routes
 """
-from flask import Blueprint, render_template, jsonify, request
+import json
+from flask import Blueprint, render_template, jsonify, request, abort, Response, stream_with_context
+from sqlalchemy.orm import joinedload
 from models import db
-from models.user import User
 from models.meal_plan import MealPlan
-from models.recipe import Recipe
+from models.daily_nutrition import DailyNutrition
+from utils.current_user import current_user_profile
+from utils.history import GRANULARITIES, iter_history
 from datetime import datetime, timedelta
 
+# Longest range accepted by the history API
+MAX_HISTORY_DAYS = 3660
+
 nutrition_bp = Blueprint('nutrition', __name__, url_prefix='/nutrition')
 
 @nutrition_bp.route('/dashboard')
 def dashboard():
     """Nutrition tracking dashboard"""
-    # Get or create default user (simplified for demo)
-    user = User.query.first()
+    # Get current user (the demo user is created at startup)
+    user = current_user_profile()
     if not user:
-        user = User(username='demo_user')
-        db.session.add(user)
-        db.session.commit()
+        abort(404)
     
-    return render_template('nutrition/dashboard.html', user=user)
+    # Embed today's stats and the weekly trend so the page needs no API calls
+    today = datetime.utcnow().date()
+    stats = build_daily_stats(user, today)
+    weekly = build_weekly_stats(user['id'], today)
+    return render_template('nutrition/dashboard.html', user=user, stats=stats, weekly=weekly)
 
 @nutrition_bp.route('/api/log', methods=['POST'])
 def log_meal():
-    """Log a meal for today"""
+    """
+    Log a meal for today
+    
+    Each meal type holds one meal per day. If one is already logged the
+    response is 409 with that meal; send "replace": true to replace it.
+    """
     data = request.get_json()
     recipe_id = data.get('recipe_id')
     meal_type = data.get('meal_type', 'lunch')
     
-    # Get default user
-    user = User.query.first()
+    # Get current user
+    user = current_user_profile()
+    if not user:
+        return jsonify({'error': 'No user found'}), 404
     
-    # Create meal plan entry for today
-    meal_plan = MealPlan(
-        user_id=user.id,
+    # Log into today's slot for this meal type
+    today = datetime.utcnow().date()
+    meal_plan = MealPlan.upsert(
+        user_id=user['id'],
         recipe_id=recipe_id,
-        date=datetime.utcnow().date(),
-        meal_type=meal_type
+        date=today,
+        meal_type=meal_type,
+        replace=data.get('replace') is True
     )
+    if meal_plan is None:
+        db.session.rollback()
+        existing = MealPlan.query.filter_by(user_id=user['id'], date=today, meal_type=meal_type).one()
+        return jsonify({
+            'success': False,
+            'error': f'A {meal_type} is already logged for today; send "replace": true to replace it',
+            'meal_plan': existing.to_dict()
+        }), 409
     
-    db.session.add(meal_plan)
+    DailyNutrition.refresh(user['id'], today)
     db.session.commit()
     
     return jsonify({
@@ -58,36 +83,46 @@ def get_stats():
     else:
         target_date = datetime.utcnow().date()
     
-    # Get default user
-    user = User.query.first()
+    # Get current user
+    user = current_user_profile()
     if not user:
         return jsonify({'error': 'No user found'}), 404
     
+    return jsonify(build_daily_stats(user, target_date))
+
+def build_daily_stats(user, target_date):
+    """
+    Goals, consumed and remaining nutrition plus meals for one day
+    
+    Returns:
+        Dictionary as served by /api/stats
+    """
     # Get all meals for the date
-    meals = MealPlan.query.filter_by(
-        user_id=user.id,
+    meals = MealPlan.query.options(joinedload(MealPlan.recipe)).filter_by(
+        user_id=user['id'],
         date=target_date
     ).all()
     
-    # Calculate totals
-    total_calories = sum(meal.recipe.calories for meal in meals if meal.recipe)
-    total_protein = sum(meal.recipe.protein or 0 for meal in meals if meal.recipe)
-    total_carbs = sum(meal.recipe.carbs or 0 for meal in meals if meal.recipe)
-    total_fats = sum(meal.recipe.fats or 0 for meal in meals if meal.recipe)
+    # Read totals from the daily rollup
+    totals = DailyNutrition.totals_for(user['id'], target_date)
+    total_calories = totals['calories']
+    total_protein = totals['protein']
+    total_carbs = totals['carbs']
+    total_fats = totals['fats']
     
     # Calculate remaining
-    remaining_calories = user.calorie_goal - total_calories
-    remaining_protein = user.protein_goal - total_protein
-    remaining_carbs = user.carbs_goal - total_carbs
-    remaining_fats = user.fats_goal - total_fats
+    remaining_calories = user['calorie_goal'] - total_calories
+    remaining_protein = user['protein_goal'] - total_protein
+    remaining_carbs = user['carbs_goal'] - total_carbs
+    remaining_fats = user['fats_goal'] - total_fats
     
-    return jsonify({
+    return {
         'date': target_date.isoformat(),
         'goals': {
-            'calories': user.calorie_goal,
-            'protein': user.protein_goal,
-            'carbs': user.carbs_goal,
-            'fats': user.fats_goal
+            'calories': user['calorie_goal'],
+            'protein': user['protein_goal'],
+            'carbs': user['carbs_goal'],
+            'fats': user['fats_goal']
         },
         'consumed': {
             'calories': total_calories,
@@ -102,28 +137,81 @@ def get_stats():
             'fats': remaining_fats
         },
         'meals': [meal.to_dict() for meal in meals]
-    })
+    }
 
 @nutrition_bp.route('/api/weekly-stats')
 def weekly_stats():
     """Get weekly nutrition trends"""
-    user = User.query.first()
+    user = current_user_profile()
     if not user:
         return jsonify({'error': 'No user found'}), 404
     
-    # Get last 7 days
-    today = datetime.utcnow().date()
-    week_data = []
+    return jsonify(build_weekly_stats(user['id'], datetime.utcnow().date()))
+
+def build_weekly_stats(user_id, today):
+    """
+    Calories for the 7 days ending today
     
+    Returns:
+        Dictionary as served by /api/weekly-stats
+    """
+    # Get last 7 days from the daily rollup in one query
+    start_date = today - timedelta(days=6)
+    rows = DailyNutrition.query.filter(
+        DailyNutrition.user_id == user_id,
+        DailyNutrition.date >= start_date,
+        DailyNutrition.date <= today
+    ).all()
+    calories_by_date = {row.date: row.calories for row in rows}
+    
+    week_data = []
     for i in range(7):
-        date = today - timedelta(days=6-i)
-        meals = MealPlan.query.filter_by(user_id=user.id, date=date).all()
-        
-        total_calories = sum(meal.recipe.calories for meal in meals if meal.recipe)
-        
+        date = start_date + timedelta(days=i)
         week_data.append({
             'date': date.isoformat(),
-            'calories': total_calories
+            'calories': calories_by_date.get(date, 0)
         })
     
-    return jsonify({'week_data': week_data})
+    return {'week_data': week_data}
+
+@nutrition_bp.route('/api/history')
+def history():
+    """
+    Get nutrition totals over a date range, grouped by day, week or month
+    
+    Query args: from, to (YYYY-MM-DD, default: the last 30 days) and
+    granularity (day, week or month, default: day). The response is
+    streamed so long ranges are never held in memory at once.
+    """
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': f"granularity must be one of: {', '.join(GRANULARITIES)}"}), 400
+    
+    try:
+        end_date = datetime.strptime(request.args['to'], '%Y-%m-%d').date() \
+            if request.args.get('to') else datetime.utcnow().date()
+        start_date = datetime.strptime(request.args['from'], '%Y-%m-%d').date() \
+            if request.args.get('from') else end_date - timedelta(days=29)
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+    
+    if start_date > end_date:
+        return jsonify({'error': "'from' must not be after 'to'"}), 400
+    if (end_date - start_date).days >= MAX_HISTORY_DAYS:
+        return jsonify({'error': f'Range is limited to {MAX_HISTORY_DAYS} days'}), 400
+    
+    user = current_user_profile()
+    if not user:
+        return jsonify({'error': 'No user found'}), 404
+    
+    def generate():
+        yield json.dumps({
+            'from': start_date.isoformat(),
+            'to': end_date.isoformat(),
+            'granularity': granularity
+        })[:-1] + ', "history": ['
+        for i, entry in enumerate(iter_history(user['id'], start_date, end_date, granularity)):
+            yield (',' if i else '') + json.dumps(entry)
+        yield ']}'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
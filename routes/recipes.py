@@ -2,11 +2,21 @@
 Recipe routes for browsing, searching, and viewing recipes
 """
 from flask import Blueprint, render_template, jsonify, request
-from models.recipe import Recipe
+from models.recipe import Recipe, API_FIELDS
+from models.tag import Tag
+from utils.search import iter_search_results, search_recipes
+from utils.streaming import BATCH_SIZE, STREAM_FORMATS, stream_list
+from utils.cache import cached_response
+from utils.current_user import current_user_profile
+from utils.nutrition_calc import calculate_daily_remaining
+from models.daily_nutrition import DailyNutrition
+from datetime import datetime
+import math
 
 recipes_bp = Blueprint('recipes', __name__, url_prefix='/recipes')
 
 @recipes_bp.route('/')
+@cached_response
 def browse():
     """Browse all recipes with optional filtering"""
     # Get filter parameters
@@ -22,15 +32,15 @@ def browse():
         query = query.filter_by(category=category)
     
     if tag:
-        query = query.filter(Recipe.tags_json.contains(tag))
+        query = query.filter(Recipe.id.in_(Tag.recipe_ids_with_all([tag])))
     
     # Paginate results
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
     recipes = pagination.items
     
-    # Get all unique categories and tags for filters
-    all_categories = ['Breakfast', 'Lunch', 'Dinner', 'Snacks']
-    all_tags = ['Vegetarian', 'Vegan', 'Gluten-Free', 'Diabetes-Friendly', 'High-Protein', 'Low-Carb']
+    # Get all categories and tags in use for filters
+    all_categories = Recipe.category_names()
+    all_tags = Tag.facet_names()
     
     return render_template('recipes/browse.html', 
                          recipes=recipes,
@@ -41,45 +51,161 @@ def browse():
                          current_tag=tag)
 
 @recipes_bp.route('/<int:recipe_id>')
+@cached_response
 def detail(recipe_id):
     """View recipe detail"""
     recipe = Recipe.query.get_or_404(recipe_id)
     return render_template('recipes/detail.html', recipe=recipe)
 
 @recipes_bp.route('/api/search')
+@cached_response
 def search():
-    """Search recipes by name or description (JSON API)"""
+    """
+    Search recipes by name, description, ingredients or tags (JSON API)
+    
+    With stream=json or stream=ndjson every match is streamed, best
+    first, instead of one page.
+    """
     query_string = request.args.get('q', '')
+    page = request.args.get('page', 1, type=int)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    stream_format = request.args.get('stream')
+    
+    if stream_format and stream_format not in STREAM_FORMATS:
+        return jsonify({'error': f"stream must be one of: {', '.join(STREAM_FORMATS)}"}), 400
     
     if not query_string:
         return jsonify({'recipes': []})
     
-    # Search in name and description
-    recipes = Recipe.query.filter(
-        (Recipe.name.ilike(f'%{query_string}%')) | 
-        (Recipe.description.ilike(f'%{query_string}%'))
-    ).limit(20).all()
+    if stream_format:
+        recipes = iter_search_results(query_string, batch_size=BATCH_SIZE)
+        return stream_list((recipe.to_dict() for recipe in recipes), stream_format, 'recipes')
+    
+    # Ranked full-text search with prefix matching for type-ahead
+    recipes = search_recipes(query_string, page=page, per_page=per_page)
     
     return jsonify({
         'recipes': [recipe.to_dict() for recipe in recipes]
     })
 
 @recipes_bp.route('/api/filter')
+@cached_response
 def filter_recipes():
-    """Filter recipes by category and tags (JSON API)"""
+    """
+    Filter recipes by category and tags (JSON API)
+    
+    Results are ordered by id and paginated by keyset: pass the returned
+    next_cursor as `after` to get the next page. `fields` is an optional
+    comma-separated list of recipe fields to return, e.g. id,name,calories.
+    With stream=json or stream=ndjson every recipe after `after` is
+    streamed instead of one page.
+    """
     category = request.args.get('category')
     tags = request.args.getlist('tags')
+    after = request.args.get('after', type=int)
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    stream_format = request.args.get('stream')
     
-    query = Recipe.query
+    if stream_format and stream_format not in STREAM_FORMATS:
+        return jsonify({'error': f"stream must be one of: {', '.join(STREAM_FORMATS)}"}), 400
+    
+    fields = API_FIELDS
+    if request.args.get('fields'):
+        fields = tuple(dict.fromkeys(request.args.get('fields').split(',')))
+        unknown = [field for field in fields if field not in API_FIELDS]
+        if unknown:
+            return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+    
+    if stream_format:
+        recipes = filter_query(category, tags, after, fields).yield_per(BATCH_SIZE)
+        return stream_list((recipe.to_dict(fields) for recipe in recipes), stream_format,
+                           'recipes', {'next_cursor': None})
+    
+    return jsonify(filter_page(category, tags, after, limit, fields))
+
+def filter_page(category=None, tags=(), after=None, limit=50, fields=API_FIELDS):
+    """
+    Get one keyset page of filtered recipes
+    
+    Returns:
+        Dictionary with recipes and next_cursor, as served by /api/filter
+    """
+    # Fetch one extra row to know whether another page exists
+    recipes = filter_query(category, tags, after, fields).limit(limit + 1).all()
+    has_more = len(recipes) > limit
+    recipes = recipes[:limit]
+    
+    return {
+        'recipes': [recipe.to_dict(fields) for recipe in recipes],
+        'next_cursor': recipes[-1].id if has_more else None
+    }
+
+def filter_query(category=None, tags=(), after=None, fields=API_FIELDS):
+    """Query for filtered recipes in id order, loading only the given fields"""
+    query = Recipe.query.options(Recipe.load_only_fields(fields))
     
     if category:
         query = query.filter_by(category=category)
     
-    for tag in tags:
-        query = query.filter(Recipe.tags_json.contains(tag))
+    if tags:
+        query = query.filter(Recipe.id.in_(Tag.recipe_ids_with_all(tags)))
+    
+    if after is not None:
+        query = query.filter(Recipe.id > after)
+    
+    return query.order_by(Recipe.id)
+
+@recipes_bp.route('/api/recommend')
+def recommend():
+    """
+    Recommend recipes that fit a nutrition budget (JSON API)
+    
+    The budget defaults to what is left of the current user's goals today
+    and can be overridden with calories, protein, carbs and fats args.
+    meals splits the budget over several meals (default 1), category
+    narrows the candidates and k sets the number of results (max 50).
+    Recipes above the per-meal calorie budget are excluded.
+    """
+    user = current_user_profile()
+    if not user:
+        return jsonify({'error': 'No user found'}), 404
+    
+    goals = {
+        'calories': user['calorie_goal'],
+        'protein': user['protein_goal'],
+        'carbs': user['carbs_goal'],
+        'fats': user['fats_goal']
+    }
+    consumed = DailyNutrition.totals_for(user['id'], datetime.utcnow().date())
+    budget = calculate_daily_remaining(consumed, goals)
+    for name in budget:
+        if request.args.get(name) is not None:
+            value = request.args.get(name, type=float)
+            if value is None or not math.isfinite(value):
+                return jsonify({'error': f'{name} must be a number'}), 400
+            budget[name] = value
     
-    recipes = query.all()
+    meals = max(request.args.get('meals', 1, type=int), 1)
+    k = min(max(request.args.get('k', 10, type=int), 1), 50)
+    target = {name: max(value, 0) / meals for name, value in budget.items()}
     
+    from utils.recipe_matrix import get_nutrition_matrix
+    recipe_ids, distances = get_nutrition_matrix().recommend(
+        target,
+        k=k,
+        category=request.args.get('category'),
+        max_calories=target['calories']
+    )
+    
+    recipes = {
+        recipe.id: recipe
+        for recipe in Recipe.query.filter(Recipe.id.in_(recipe_ids.tolist()))
+    }
     return jsonify({
-        'recipes': [recipe.to_dict() for recipe in recipes]
+        'target': target,
+        'recipes': [
+            dict(recipes[recipe_id].to_dict(), match_distance=round(float(distance), 4))
+            for recipe_id, distance in zip(recipe_ids.tolist(), distances)
+            if recipe_id in recipes
+        ]
     })
@@ -0,0 +1,64 @@
+"""
+Shared fixtures: an app on a fresh in-memory database per test
+"""
+import pytest
+from config import Config
+from app import create_app
+from models import db
+from models.daily_nutrition import DailyNutrition
+from models.meal_plan import MealPlan
+from models.recipe import Recipe
+from models.user import User
+
+class TestConfig(Config):
+    """In-memory database, with caching and compression off"""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    DATABASE_SNAPSHOT = None
+    RESPONSE_CACHE = 'none'
+    FRAGMENT_CACHE = 'none'
+    COMPRESS_RESPONSES = False
+    FINGERPRINT_STATIC = False
+
+@pytest.fixture
+def config():
+    """Config class the app is created with; override it to change settings"""
+    return TestConfig
+
+@pytest.fixture
+def app(config):
+    app = create_app(config)
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def recipes(app):
+    """A few recipes with distinct nutrition values"""
+    recipes = [
+        Recipe(name=f'Recipe {i}', description='A test recipe.', category='Lunch',
+               calories=300 + 100 * i, protein=10 + i, carbs=30, fats=10, fiber=5)
+        for i in range(3)
+    ]
+    db.session.add_all(recipes)
+    db.session.commit()
+    return recipes
+
+@pytest.fixture
+def user_id(app):
+    """Id of the default user that requests act as"""
+    return db.session.scalar(db.select(User.id).order_by(User.id).limit(1))
+
+@pytest.fixture
+def add_meal(user_id):
+    """Plan a recipe for the default user and refresh that day's rollup"""
+    def add_meal(recipe, day, meal_type='lunch'):
+        db.session.add(MealPlan(user_id=user_id, recipe_id=recipe.id, date=day, meal_type=meal_type))
+        DailyNutrition.refresh(user_id, day)
+        db.session.commit()
+    return add_meal
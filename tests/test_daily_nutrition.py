@@ -0,0 +1,71 @@
+"""
+The daily_nutrition rollup kept in sync with meal_plans
+"""
+from datetime import date, datetime
+from models import db
+from models.daily_nutrition import DailyNutrition
+
+DAY = date(2024, 1, 1)
+
+def rollup(user_id, day):
+    """The stored rollup row for a day as a totals dictionary, or None"""
+    row = db.session.get(DailyNutrition, (user_id, day))
+    return row and dict(row.to_dict(), meal_count=row.meal_count)
+
+def add(client, recipe, meal_type, day=DAY):
+    response = client.post('/meal-planner/api/add', json={
+        'recipe_id': recipe.id, 'date': day.isoformat(), 'meal_type': meal_type
+    })
+    assert response.status_code == 200
+    return response.get_json()['meal_plan']['id']
+
+def test_add_and_replace_refresh_the_day(client, recipes, user_id):
+    add(client, recipes[0], 'breakfast')
+    add(client, recipes[1], 'dinner')
+    
+    totals = rollup(user_id, DAY)
+    assert totals['meal_count'] == 2
+    assert totals['calories'] == recipes[0].calories + recipes[1].calories
+    assert totals['protein'] == recipes[0].protein + recipes[1].protein
+    
+    add(client, recipes[2], 'dinner')
+    totals = rollup(user_id, DAY)
+    assert totals['meal_count'] == 2
+    assert totals['calories'] == recipes[0].calories + recipes[2].calories
+
+def test_remove_refreshes_and_drops_empty_days(client, recipes, user_id):
+    breakfast = add(client, recipes[0], 'breakfast')
+    dinner = add(client, recipes[1], 'dinner')
+    
+    assert client.delete(f'/meal-planner/api/remove/{breakfast}').status_code == 200
+    assert rollup(user_id, DAY)['calories'] == recipes[1].calories
+    
+    assert client.delete(f'/meal-planner/api/remove/{dinner}').status_code == 200
+    assert rollup(user_id, DAY) is None
+    assert DailyNutrition.totals_for(user_id, DAY)['calories'] == 0
+
+def test_log_refreshes_today(client, recipes, user_id):
+    client.post('/nutrition/api/log', json={'recipe_id': recipes[0].id, 'meal_type': 'lunch'})
+    client.post('/nutrition/api/log', json={'recipe_id': recipes[1].id, 'meal_type': 'snack'})
+    
+    today = datetime.utcnow().date()
+    assert rollup(user_id, today)['calories'] == recipes[0].calories + recipes[1].calories
+    assert client.get('/nutrition/api/stats').get_json()['consumed']['calories'] == \
+        recipes[0].calories + recipes[1].calories
+
+def test_other_days_are_untouched(client, recipes, user_id):
+    add(client, recipes[0], 'lunch', date(2024, 1, 2))
+    add(client, recipes[1], 'lunch')
+    
+    assert rollup(user_id, date(2024, 1, 2))['calories'] == recipes[0].calories
+    assert rollup(user_id, DAY)['calories'] == recipes[1].calories
+
+def test_rebuild_matches_refreshed_rows(client, recipes, user_id):
+    add(client, recipes[0], 'breakfast')
+    add(client, recipes[1], 'lunch', date(2024, 1, 2))
+    refreshed = {day: rollup(user_id, day) for day in (DAY, date(2024, 1, 2))}
+    
+    DailyNutrition.rebuild()
+    db.session.expire_all()
+    
+    assert {day: rollup(user_id, day) for day in refreshed} == refreshed
@@ -0,0 +1,42 @@
+"""
+Cached recipe fragments
+"""
+import pytest
+from models import db
+from models.recipe import Recipe
+from tests.conftest import TestConfig
+
+class FragmentCacheConfig(TestConfig):
+    FRAGMENT_CACHE = 'simple'
+
+@pytest.fixture
+def config():
+    return FragmentCacheConfig
+
+def add_recipe(name):
+    recipe = Recipe(name=name, description=f'All about {name}.', category='Dinner', calories=500)
+    db.session.add(recipe)
+    db.session.commit()
+    return recipe.id
+
+def test_unchanged_recipe_reuses_markup(app, client):
+    recipe_id = add_recipe('Lentil Soup')
+    
+    client.get(f'/recipes/{recipe_id}')
+    client.get(f'/recipes/{recipe_id}')
+    
+    counts = app.extensions['fragment_stats'].to_dict()['templates']['fragments/recipe_detail.html']
+    assert counts['hits'] == 1 and counts['misses'] == 1
+
+def test_reused_id_does_not_get_deleted_recipes_markup(client):
+    old_id = add_recipe('Lentil Soup')
+    assert b'Lentil Soup' in client.get(f'/recipes/{old_id}').data
+    
+    db.session.delete(db.session.get(Recipe, old_id))
+    db.session.commit()
+    new_id = add_recipe('Mushroom Risotto')
+    assert new_id == old_id
+    
+    body = client.get(f'/recipes/{new_id}').data
+    assert b'Mushroom Risotto' in body
+    assert b'Lentil Soup' not in body
@@ -0,0 +1,75 @@
+"""
+All-or-nothing meal plan batches (/meal-planner/api/batch)
+"""
+from datetime import date, timedelta
+from models import db
+from models.daily_nutrition import DailyNutrition
+from models.meal_plan import MealPlan
+
+MONDAY = date(2024, 1, 1)
+
+def day(offset):
+    return (MONDAY + timedelta(days=offset)).isoformat()
+
+def test_invalid_operation_writes_nothing(client, recipes):
+    response = client.post('/meal-planner/api/batch', json={
+        'week_start': day(0),
+        'operations': [
+            {'op': 'add', 'date': day(0), 'meal_type': 'breakfast', 'recipe_id': recipes[0].id},
+            {'op': 'add', 'date': day(1), 'meal_type': 'lunch', 'recipe_id': recipes[1].id},
+            {'op': 'add', 'date': day(2), 'meal_type': 'brunch', 'recipe_id': recipes[2].id},
+            {'op': 'add', 'date': day(3), 'meal_type': 'dinner', 'recipe_id': 999999},
+        ]
+    })
+    
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['success'] is False
+    assert [error['index'] for error in body['errors']] == [2]
+    assert 'meal_type' in body['errors'][0]['error']
+    assert db.session.scalar(db.select(db.func.count(MealPlan.id))) == 0
+    assert db.session.scalar(db.select(db.func.count()).select_from(DailyNutrition)) == 0
+
+def test_unknown_recipe_rejects_whole_batch(client, recipes):
+    response = client.post('/meal-planner/api/batch', json={
+        'operations': [
+            {'op': 'add', 'date': day(0), 'meal_type': 'breakfast', 'recipe_id': recipes[0].id},
+            {'op': 'replace', 'date': day(1), 'meal_type': 'lunch', 'recipe_id': recipes[1].id},
+            {'op': 'add', 'date': day(2), 'meal_type': 'dinner', 'recipe_id': 999999},
+        ]
+    })
+    
+    assert response.status_code == 400
+    assert [error['index'] for error in response.get_json()['errors']] == [1, 2]
+    assert db.session.scalar(db.select(db.func.count(MealPlan.id))) == 0
+
+def test_valid_batch_returns_recomputed_week(client, recipes):
+    breakfast, lunch, dinner = recipes
+    response = client.post('/meal-planner/api/batch', json={
+        'week_start': day(3),
+        'operations': [
+            {'op': 'add', 'date': day(0), 'meal_type': 'breakfast', 'recipe_id': breakfast.id},
+            {'op': 'add', 'date': day(0), 'meal_type': 'lunch', 'recipe_id': breakfast.id},
+            {'op': 'replace', 'date': day(0), 'meal_type': 'lunch', 'recipe_id': lunch.id},
+            {'op': 'add', 'date': day(0), 'meal_type': 'dinner', 'recipe_id': dinner.id},
+            {'op': 'add', 'date': day(1), 'meal_type': 'dinner', 'recipe_id': dinner.id},
+            {'op': 'remove', 'date': day(1), 'meal_type': 'dinner'},
+        ]
+    })
+    
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['success'] is True
+    assert body['applied'] == 6
+    assert body['start_date'] == day(0)
+    
+    monday = body['week_plan'][day(0)]
+    assert monday['meals']['breakfast']['recipe_id'] == breakfast.id
+    assert monday['meals']['lunch']['recipe_id'] == lunch.id
+    assert monday['meals']['dinner']['recipe_id'] == dinner.id
+    assert monday['totals']['calories'] == breakfast.calories + lunch.calories + dinner.calories
+    assert body['week_plan'][day(1)]['meals'] == {'breakfast': None, 'lunch': None, 'dinner': None}
+    
+    assert db.session.scalar(db.select(db.func.count(MealPlan.id))) == 3
+    totals = DailyNutrition.query.filter_by(date=MONDAY).one()
+    assert totals.calories == monday['totals']['calories']
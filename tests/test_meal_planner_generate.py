@@ -0,0 +1,18 @@
+"""
+Meal plan generation (/meal-planner/api/generate)
+"""
+import pytest
+
+@pytest.mark.parametrize('body', [
+    {'days': True},
+    {'days': 0},
+    {'days': '7'},
+    {'seed': True},
+    {'seed': 'abc'},
+    {'seed': -1},
+])
+def test_invalid_arguments_are_rejected(client, recipes, body):
+    response = client.post('/meal-planner/api/generate', json=body)
+    
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
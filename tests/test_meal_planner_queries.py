@@ -0,0 +1,56 @@
+"""
+Query counts of the weekly meal plan
+"""
+from contextlib import contextmanager
+from datetime import date, timedelta
+from sqlalchemy import event
+from models import db
+from models.meal_plan import MEAL_TYPES, MealPlan
+from routes.meal_planner import build_week
+from utils.current_user import current_user_profile
+
+MONDAY = date(2024, 1, 1)
+
+@contextmanager
+def count_statements():
+    """Count SQL statements executed on the engine inside the block"""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+def plan_week(user_id, recipe_ids):
+    """Plan every meal of the week starting MONDAY"""
+    db.session.add_all(
+        MealPlan(user_id=user_id, recipe_id=recipe_ids[(day + i) % len(recipe_ids)],
+                 date=MONDAY + timedelta(days=day), meal_type=meal_type)
+        for day in range(7)
+        for i, meal_type in enumerate(MEAL_TYPES)
+    )
+    db.session.commit()
+
+def week_statements(user_id):
+    """Build the week from a fresh session and return the statements it ran"""
+    db.session.remove()
+    with count_statements() as statements:
+        week = build_week(user_id, MONDAY)
+    return week, statements
+
+def test_build_week_statement_count_does_not_grow_with_meals(app, recipes):
+    with app.test_request_context():
+        user_id = current_user_profile()['id']
+    recipe_ids = [recipe.id for recipe in recipes]
+    
+    empty_week, empty_statements = week_statements(user_id)
+    plan_week(user_id, recipe_ids)
+    full_week, full_statements = week_statements(user_id)
+    
+    assert all(meal for day in full_week['week_plan'].values() for meal in day['meals'].values())
+    assert not any(meal for day in empty_week['week_plan'].values() for meal in day['meals'].values())
+    assert len(full_statements) == len(empty_statements)
@@ -0,0 +1,44 @@
+"""
+Upgrades of databases created by older versions
+"""
+from datetime import date
+from sqlalchemy import inspect, text
+from models import db
+from models.daily_nutrition import DailyNutrition
+from models.meal_plan import MealPlan
+from utils.migrations import DUPLICATE_MEALS_TABLE, remove_duplicate_meal_slots, upgrade_database
+
+DAY = date(2024, 1, 1)
+
+def add_duplicate_lunches(recipes):
+    """Recreate a database from before meal slots were unique"""
+    db.session.execute(text('DROP INDEX uq_meal_plans_user_date_meal'))
+    db.session.add_all(
+        MealPlan(user_id=1, recipe_id=recipe.id, date=DAY, meal_type='lunch') for recipe in recipes
+    )
+    db.session.commit()
+    DailyNutrition.rebuild()
+
+def index_names():
+    return {index['name'] for index in inspect(db.engine).get_indexes('meal_plans')}
+
+def test_upgrade_keeps_duplicate_meals(app, recipes):
+    add_duplicate_lunches(recipes)
+    
+    upgrade_database()
+    
+    assert db.session.scalar(db.select(db.func.count(MealPlan.id))) == 3
+    assert 'uq_meal_plans_user_date_meal' not in index_names()
+
+def test_dedupe_backs_up_removed_meals(app, recipes):
+    add_duplicate_lunches(recipes)
+    
+    assert remove_duplicate_meal_slots() == 2
+    
+    kept = MealPlan.query.one()
+    assert kept.recipe_id == recipes[-1].id
+    backed_up = db.session.execute(text(f'SELECT recipe_id FROM {DUPLICATE_MEALS_TABLE} ORDER BY id')).scalars().all()
+    assert backed_up == [recipe.id for recipe in recipes[:-1]]
+    assert DailyNutrition.totals_for(1, DAY)['calories'] == recipes[-1].calories
+    assert 'uq_meal_plans_user_date_meal' in index_names()
+    assert remove_duplicate_meal_slots() == 0
@@ -0,0 +1,55 @@
+"""
+Nutrition history (/nutrition/api/history)
+"""
+from datetime import date
+import pytest
+
+def history(client, **args):
+    response = client.get('/nutrition/api/history', query_string=args)
+    assert response.status_code == 200
+    return response.get_json()['history']
+
+def test_days_without_meals_are_zero(client, recipes, add_meal):
+    add_meal(recipes[0], date(2024, 1, 2), 'breakfast')
+    add_meal(recipes[1], date(2024, 1, 2), 'dinner')
+    add_meal(recipes[2], date(2024, 1, 4))
+    
+    entries = history(client, **{'from': '2024-01-01', 'to': '2024-01-05'})
+    
+    assert [entry['period_start'] for entry in entries] == [
+        '2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05'
+    ]
+    assert [entry['meal_count'] for entry in entries] == [0, 2, 0, 1, 0]
+    assert entries[1]['calories'] == recipes[0].calories + recipes[1].calories
+    assert entries[1]['protein'] == recipes[0].protein + recipes[1].protein
+    assert entries[0] == {'period_start': '2024-01-01', 'calories': 0, 'protein': 0,
+                          'carbs': 0, 'fats': 0, 'meal_count': 0}
+
+def test_weeks_start_on_monday(client, recipes, add_meal):
+    add_meal(recipes[0], date(2024, 1, 3))
+    add_meal(recipes[1], date(2024, 1, 7))
+    add_meal(recipes[2], date(2024, 1, 17))
+    
+    entries = history(client, **{'from': '2024-01-03', 'to': '2024-01-20', 'granularity': 'week'})
+    
+    assert [entry['period_start'] for entry in entries] == ['2024-01-01', '2024-01-08', '2024-01-15']
+    assert [entry['meal_count'] for entry in entries] == [2, 0, 1]
+    assert entries[0]['calories'] == recipes[0].calories + recipes[1].calories
+
+def test_months(client, recipes, add_meal):
+    add_meal(recipes[0], date(2024, 1, 31))
+    add_meal(recipes[1], date(2024, 3, 1))
+    
+    entries = history(client, **{'from': '2024-01-15', 'to': '2024-03-10', 'granularity': 'month'})
+    
+    assert [entry['period_start'] for entry in entries] == ['2024-01-01', '2024-02-01', '2024-03-01']
+    assert [entry['calories'] for entry in entries] == [recipes[0].calories, 0, recipes[1].calories]
+
+@pytest.mark.parametrize('args', [
+    {'granularity': 'year'},
+    {'from': '2024-02-01', 'to': '2024-01-01'},
+    {'from': '2024-13-01'},
+    {'from': '2000-01-01', 'to': '2024-01-01'},
+])
+def test_invalid_ranges_are_rejected(client, args):
+    assert client.get('/nutrition/api/history', query_string=args).status_code == 400
@@ -0,0 +1,27 @@
+"""
+Logging meals (/nutrition/api/log)
+"""
+from models import db
+from models.meal_plan import MealPlan
+
+def test_second_meal_in_a_slot_conflicts(client, recipes):
+    first = client.post('/nutrition/api/log', json={'recipe_id': recipes[0].id, 'meal_type': 'lunch'})
+    second = client.post('/nutrition/api/log', json={'recipe_id': recipes[1].id, 'meal_type': 'lunch'})
+    
+    assert first.status_code == 200
+    assert second.status_code == 409
+    assert second.get_json()['meal_plan']['id'] == first.get_json()['meal_plan']['id']
+    assert second.get_json()['meal_plan']['recipe_id'] == recipes[0].id
+    assert db.session.scalar(db.select(MealPlan.recipe_id)) == recipes[0].id
+    assert client.get('/nutrition/api/stats').get_json()['consumed']['calories'] == recipes[0].calories
+
+def test_replace_swaps_the_logged_meal(client, recipes):
+    client.post('/nutrition/api/log', json={'recipe_id': recipes[0].id, 'meal_type': 'lunch'})
+    response = client.post('/nutrition/api/log', json={
+        'recipe_id': recipes[1].id, 'meal_type': 'lunch', 'replace': True
+    })
+    
+    assert response.status_code == 200
+    assert response.get_json()['meal_plan']['recipe_id'] == recipes[1].id
+    assert db.session.scalar(db.select(db.func.count(MealPlan.id))) == 1
+    assert client.get('/nutrition/api/stats').get_json()['consumed']['calories'] == recipes[1].calories
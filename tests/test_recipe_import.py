@@ -0,0 +1,88 @@
+"""
+Bulk recipe import (utils.recipe_import)
+"""
+import json
+import os
+import pytest
+from models import db
+from models.recipe import Recipe
+from utils import recipe_import
+from utils.recipe_import import checkpoint_path, import_recipes
+
+def write_jsonl(path, count, extra=()):
+    records = [
+        {'name': f'Imported {i}', 'description': 'From a file.', 'calories': 100 + i, 'tags': ['Quick']}
+        for i in range(count)
+    ]
+    with open(path, 'w') as f:
+        for record in records + list(extra):
+            f.write(json.dumps(record) + '\n')
+    return str(path)
+
+def imported_names():
+    return db.session.scalars(db.select(Recipe.name).order_by(Recipe.id)).all()
+
+def interrupt_after_batches(monkeypatch, batches):
+    """Make insert_batch fail once `batches` batches have been inserted"""
+    insert_batch = recipe_import.insert_batch
+    calls = []
+    
+    def failing_insert_batch(batch):
+        calls.append(len(batch))
+        if len(calls) > batches:
+            raise RuntimeError('interrupted')
+        return insert_batch(batch)
+    
+    monkeypatch.setattr(recipe_import, 'insert_batch', failing_insert_batch)
+
+def test_interrupted_import_resumes_from_checkpoint(app, tmp_path, monkeypatch):
+    path = write_jsonl(tmp_path / 'recipes.jsonl', 5)
+    
+    interrupt_after_batches(monkeypatch, 1)
+    with pytest.raises(RuntimeError):
+        import_recipes(path, batch_size=2, report=lambda line: None)
+    with open(checkpoint_path(path)) as f:
+        assert f.read() == '2'
+    assert imported_names() == ['Imported 0', 'Imported 1']
+    
+    monkeypatch.undo()
+    stats = import_recipes(path, batch_size=2, report=lambda line: None)
+    
+    assert stats.resumed_from == 2
+    assert stats.imported == 3
+    assert imported_names() == [f'Imported {i}' for i in range(5)]
+    assert not os.path.exists(checkpoint_path(path))
+
+def test_no_resume_starts_over(app, tmp_path):
+    path = write_jsonl(tmp_path / 'recipes.jsonl', 3)
+    with open(checkpoint_path(path), 'w') as f:
+        f.write('2')
+    
+    stats = import_recipes(path, resume=False, report=lambda line: None)
+    
+    assert stats.imported == 3
+    assert len(imported_names()) == 3
+
+def test_invalid_rows_are_skipped(app, tmp_path):
+    path = tmp_path / 'recipes.jsonl'
+    write_jsonl(path, 2, extra=[
+        {'name': 'No description', 'calories': 100},
+        {'name': 'Not a number', 'description': 'x', 'calories': 'NaN'},
+        {'name': 'Negative', 'description': 'x', 'calories': -5},
+    ])
+    
+    stats = import_recipes(str(path), report=lambda line: None)
+    
+    assert stats.imported == 2
+    assert stats.invalid == 3
+    assert [error.split(':')[0] for error in stats.errors] == ['line 3', 'line 4', 'line 5']
+    assert imported_names() == ['Imported 0', 'Imported 1']
+
+def test_unknown_extension_is_a_usage_error(app, tmp_path):
+    path = tmp_path / 'recipes.txt'
+    path.write_text('{}\n')
+    
+    result = app.test_cli_runner().invoke(args=['import-recipes', str(path), '--no-thumbnails'])
+    
+    assert result.exit_code == 2
+    assert "Invalid value for '--format'" in result.output
@@ -0,0 +1,11 @@
+"""
+Recipe search API (/recipes/api/search)
+"""
+import pytest
+
+@pytest.mark.parametrize('per_page, expected', [(0, 1), (-5, 1), (2, 2), (1000, 3)])
+def test_per_page_is_clamped(client, recipes, per_page, expected):
+    response = client.get(f'/recipes/api/search?q=recipe&per_page={per_page}')
+    
+    assert response.status_code == 200
+    assert len(response.get_json()['recipes']) == expected
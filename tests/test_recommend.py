@@ -0,0 +1,48 @@
+"""
+Recipe recommendations (/recipes/api/recommend)
+"""
+import pytest
+
+def recommend(client, **args):
+    response = client.get('/recipes/api/recommend', query_string=args)
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_closest_recipe_first(client, recipes):
+    body = recommend(client, calories=400, protein=11, carbs=30, fats=10)
+    
+    ids = [recipe['id'] for recipe in body['recipes']]
+    assert ids == [recipes[1].id, recipes[0].id]
+    assert body['recipes'][0]['match_distance'] == 0
+    assert body['recipes'][1]['match_distance'] > 0
+
+def test_recipes_over_the_calorie_budget_are_excluded(client, recipes):
+    body = recommend(client, calories=350, protein=10, carbs=30, fats=10)
+    
+    assert [recipe['id'] for recipe in body['recipes']] == [recipes[0].id]
+
+def test_budget_is_split_over_meals(client, recipes):
+    body = recommend(client, calories=1000, protein=24, carbs=60, fats=20, meals=2)
+    
+    assert body['target'] == {'calories': 500, 'protein': 12, 'carbs': 30, 'fats': 10}
+    assert body['recipes'][0]['id'] == recipes[2].id
+
+def test_default_budget_is_what_is_left_today(client, recipes):
+    stats = client.get('/nutrition/api/stats').get_json()
+    client.post('/nutrition/api/log', json={'recipe_id': recipes[2].id, 'meal_type': 'lunch'})
+    
+    target = recommend(client)['target']
+    
+    assert target['calories'] == stats['goals']['calories'] - recipes[2].calories
+    assert target['protein'] == stats['goals']['protein'] - recipes[2].protein
+
+def test_k_and_category(client, recipes):
+    assert len(recommend(client, calories=1000, k=2)['recipes']) == 2
+    assert recommend(client, calories=1000, category='Dinner')['recipes'] == []
+
+@pytest.mark.parametrize('value', ['abc', 'nan', 'inf', ''])
+def test_bad_override_is_rejected(client, recipes, value):
+    response = client.get('/recipes/api/recommend', query_string={'calories': value})
+    
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'calories must be a number'}
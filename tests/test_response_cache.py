@@ -0,0 +1,58 @@
+"""
+Cached recipe responses with ETags
+"""
+import pytest
+from models import db
+from tests.conftest import TestConfig
+
+class ResponseCacheConfig(TestConfig):
+    RESPONSE_CACHE = 'simple'
+
+@pytest.fixture
+def config():
+    return ResponseCacheConfig
+
+URL = '/recipes/api/filter?fields=id,name'
+
+def test_matching_etag_gets_304(client, recipes):
+    first = client.get(URL)
+    etag = first.headers['ETag']
+    
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'no-cache'
+    
+    repeat = client.get(URL, headers={'If-None-Match': etag})
+    assert repeat.status_code == 304
+    assert repeat.data == b''
+    assert repeat.headers['ETag'] == etag
+
+def test_cached_body_is_reused(client, recipes):
+    first = client.get(URL)
+    # A Core-level write skips the ORM events, so the cache is not cleared
+    db.session.execute(db.text("UPDATE recipes SET name = 'Renamed'"))
+    db.session.commit()
+    
+    second = client.get(URL)
+    assert second.data == first.data
+    assert second.headers['ETag'] == first.headers['ETag']
+
+def test_recipe_write_invalidates(client, recipes):
+    first = client.get(URL)
+    etag = first.headers['ETag']
+    
+    recipes[0].name = 'Renamed Recipe'
+    db.session.commit()
+    
+    after = client.get(URL, headers={'If-None-Match': etag})
+    assert after.status_code == 200
+    assert after.headers['ETag'] != etag
+    assert after.get_json()['recipes'][0]['name'] == 'Renamed Recipe'
+
+def test_rolled_back_write_keeps_cache(client, recipes):
+    etag = client.get(URL).headers['ETag']
+    
+    recipes[0].name = 'Never Saved'
+    db.session.flush()
+    db.session.rollback()
+    
+    assert client.get(URL, headers={'If-None-Match': etag}).status_code == 304
@@ -0,0 +1,70 @@
+"""
+Streamed search and filter results (stream=json / stream=ndjson)
+"""
+import json
+import pytest
+from models import db
+from models.recipe import Recipe
+from utils.streaming import BATCH_SIZE, CHUNK_SIZE
+
+# Enough rows for several database batches and output chunks
+RECIPE_COUNT = BATCH_SIZE * 2 + 7
+
+@pytest.fixture
+def many_recipes(app):
+    db.session.execute(db.insert(Recipe), [
+        {'name': f'Stream Bowl {i}', 'description': 'A "quoted" \\ description\nover two lines.',
+         'category': 'Lunch' if i % 2 else 'Dinner', 'calories': 400 + i}
+        for i in range(RECIPE_COUNT)
+    ])
+    db.session.commit()
+
+def test_json_stream_is_one_valid_document(client, many_recipes):
+    response = client.get('/recipes/api/filter?stream=json&fields=id,name,description')
+    
+    assert response.is_streamed
+    assert response.mimetype == 'application/json'
+    assert len(response.data) > CHUNK_SIZE
+    body = json.loads(response.data)
+    assert body['next_cursor'] is None
+    assert len(body['recipes']) == RECIPE_COUNT
+    assert body['recipes'][0] == {'id': 1, 'name': 'Stream Bowl 0',
+                                  'description': 'A "quoted" \\ description\nover two lines.'}
+    assert [recipe['id'] for recipe in body['recipes']] == list(range(1, RECIPE_COUNT + 1))
+
+def test_ndjson_stream_has_one_recipe_per_line(client, many_recipes):
+    response = client.get('/recipes/api/filter?stream=ndjson&category=Lunch&after=100')
+    
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.data.decode().splitlines()
+    recipes = [json.loads(line) for line in lines]
+    assert response.data.endswith(b'\n')
+    assert all(recipe['category'] == 'Lunch' and recipe['id'] > 100 for recipe in recipes)
+    assert len(recipes) == sum(1 for i in range(100, RECIPE_COUNT) if i % 2)
+
+def test_streamed_filter_matches_pages(client, many_recipes):
+    streamed = json.loads(client.get('/recipes/api/filter?stream=json&fields=id,calories').data)['recipes']
+    
+    paged, after = [], None
+    while True:
+        url = '/recipes/api/filter?fields=id,calories&limit=200'
+        page = client.get(url + (f'&after={after}' if after else '')).get_json()
+        paged += page['recipes']
+        after = page['next_cursor']
+        if after is None:
+            break
+    assert streamed == paged
+
+def test_search_stream(client, many_recipes):
+    body = json.loads(client.get('/recipes/api/search?q=bowl&stream=json').data)
+    assert len(body['recipes']) == RECIPE_COUNT
+    
+    empty = json.loads(client.get('/recipes/api/search?q=nothingmatches&stream=json').data)
+    assert empty == {'recipes': []}
+
+@pytest.mark.parametrize('url', [
+    '/recipes/api/filter?stream=xml',
+    '/recipes/api/search?q=bowl&stream=csv',
+])
+def test_unknown_stream_format_is_rejected(client, url):
+    assert client.get(url).status_code == 400
@@ -0,0 +1,123 @@
+"""
+Fingerprinted static assets
+
+flask build-assets copies each file under static/ to a name containing a
+hash of its content (css/style.css -> css/style.1a2b3c4d5e.css), writes
+.br/.gz siblings of text assets and records the names in
+static/assets.json. With FINGERPRINT_STATIC on, url_for('static', ...)
+links the hashed copies, which are served with a one-year immutable
+Cache-Control since their content never changes under the same name.
+"""
+import os
+import re
+import shutil
+from flask import request
+from utils.compression import SUFFIXES, is_compressible, precompress
+from utils.images import THUMBNAIL_DIR, static_url
+from utils.manifests import ManifestCache, file_hash, read_manifest, write_manifest
+
+MANIFEST_NAME = 'assets.json'
+
+HASH_LENGTH = 10
+HASHED_NAME = re.compile(r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{%d})(?P<ext>\.[^./]+)?$' % HASH_LENGTH)
+
+# Far-future caching for fingerprinted files
+ASSET_MAX_AGE = 365 * 24 * 60 * 60
+
+def hashed_name(filename, content_hash):
+    """css/style.css -> css/style.<hash>.css"""
+    stem, ext = os.path.splitext(filename)
+    return f'{stem}.{content_hash}{ext}'
+
+def find_assets(static_folder):
+    """
+    Static filenames (relative, '/'-separated) and paths of source files
+    
+    Skips thumbnails, which are already hashed, earlier hashed copies,
+    compressed siblings and the manifest itself.
+    """
+    thumbnail_dir = os.path.join(static_folder, THUMBNAIL_DIR)
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != thumbnail_dir)
+        for name in sorted(files):
+            if name.endswith(tuple(SUFFIXES.values())) or name.endswith('.tmp') \
+                    or HASHED_NAME.match(name):
+                continue
+            path = os.path.join(root, name)
+            filename = static_url(static_folder, path)[len('/static/'):]
+            if filename != MANIFEST_NAME:
+                yield filename, path
+
+def build_assets(static_folder):
+    """
+    Fingerprint and precompress static files and rewrite the manifest
+    
+    Hashed copies from the previous build that are no longer current are
+    deleted.
+    
+    Returns:
+        Tuple of (files fingerprinted, compressed files written, stale files removed)
+    """
+    manifest_path = os.path.join(static_folder, MANIFEST_NAME)
+    previous = read_manifest(manifest_path)
+    manifest = {}
+    compressed = 0
+    for filename, path in find_assets(static_folder):
+        target_name = hashed_name(filename, file_hash(path, HASH_LENGTH))
+        target = os.path.join(static_folder, *target_name.split('/'))
+        if not os.path.exists(target):
+            shutil.copy2(path, target)
+        manifest[filename] = target_name
+        if is_compressible(path):
+            compressed += precompress(path) + precompress(target)
+    
+    removed = 0
+    for filename, old_name in previous.items():
+        if manifest.get(filename) == old_name:
+            continue
+        old_path = os.path.join(static_folder, *old_name.split('/'))
+        for path in [old_path] + [old_path + suffix for suffix in SUFFIXES.values()]:
+            if os.path.exists(path):
+                os.remove(path)
+                removed += 1
+    
+    write_manifest(manifest_path, manifest)
+    return len(manifest), compressed, removed
+
+def init_assets(app):
+    """Link fingerprinted copies from url_for and cache them forever"""
+    manifest = ManifestCache(os.path.join(app.static_folder, MANIFEST_NAME))
+    app.extensions['asset_manifest'] = manifest
+    if not app.config.get('FINGERPRINT_STATIC'):
+        return
+    
+    @app.url_defaults
+    def fingerprint_static_urls(endpoint, values):
+        if endpoint == 'static':
+            hashed = manifest.get().get(values.get('filename'))
+            if hashed:
+                values['filename'] = hashed
+    
+    def is_current_asset(filename):
+        """Whether a static filename is a hashed copy listed in the manifest"""
+        if not filename:
+            return False
+        filename = filename.replace(os.sep, '/')
+        match = HASHED_NAME.match(filename)
+        return bool(match) and \
+            manifest.get().get(match['stem'] + (match['ext'] or '')) == filename
+    
+    default_max_age = app.get_send_file_max_age
+    
+    def get_send_file_max_age(filename):
+        if is_current_asset(filename):
+            return ASSET_MAX_AGE
+        return default_max_age(filename)
+    
+    app.get_send_file_max_age = get_send_file_max_age
+    
+    @app.after_request
+    def mark_assets_immutable(response):
+        if request.endpoint == 'static' and response.cache_control.max_age == ASSET_MAX_AGE:
+            response.cache_control.immutable = True
+        return response
@@ -0,0 +1,235 @@
+"""
+Response caching for read-mostly endpoints
+
+Cached responses are keyed on the request path and query string and
+served with strong ETags, so repeat clients get 304 Not Modified without
+a database query. Every cache is cleared when a commit writes recipes.
+
+Backends:
+    simple - in-process LRU with TTL (per worker)
+    redis  - any Redis-compatible server, shared by all workers
+    none   - disabled; responses still get ETags
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, has_app_context, make_response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models.recipe import Recipe
+from models.tag import Tag
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with per-entry expiry"""
+    
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Get a value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def get_many(self, keys):
+        """Get a list of values, with None for missing keys"""
+        return [self.get(key) for key in keys]
+    
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry if full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def set_many(self, values):
+        """Store every key and value of a dictionary"""
+        for key, value in values.items():
+            self.set(key, value)
+    
+    def delete(self, key):
+        """Drop one entry if present"""
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+class RedisCache:
+    """
+    Cache stored in a Redis-compatible server
+    
+    Keys are namespaced by a generation counter; clear() bumps the
+    counter so every worker stops seeing old entries at once.
+    """
+    
+    def __init__(self, client, ttl=300, prefix='eatr:response:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+    
+    def _key(self, key):
+        generation = int(self.client.get(self.prefix + 'generation') or 0)
+        return f'{self.prefix}{generation}:{key}'
+    
+    def get(self, key):
+        """Get a value, or None if missing or expired"""
+        raw = self.client.get(self._key(key))
+        return pickle.loads(raw) if raw is not None else None
+    
+    def get_many(self, keys):
+        """Get a list of values, with None for missing keys, in one round trip"""
+        if not keys:
+            return []
+        generation = int(self.client.get(self.prefix + 'generation') or 0)
+        raws = self.client.mget([f'{self.prefix}{generation}:{key}' for key in keys])
+        return [pickle.loads(raw) if raw is not None else None for raw in raws]
+    
+    def set(self, key, value):
+        """Store a value with the configured TTL"""
+        self.client.set(self._key(key), pickle.dumps(value), ex=self.ttl)
+    
+    def set_many(self, values):
+        """Store every key and value of a dictionary in one round trip"""
+        generation = int(self.client.get(self.prefix + 'generation') or 0)
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipeline.set(f'{self.prefix}{generation}:{key}', pickle.dumps(value), ex=self.ttl)
+        pipeline.execute()
+    
+    def clear(self):
+        """Invalidate every entry written so far"""
+        self.client.incr(self.prefix + 'generation')
+
+class NullCache:
+    """Cache that stores nothing"""
+    
+    def get(self, key):
+        return None
+    
+    def get_many(self, keys):
+        return [None] * len(keys)
+    
+    def set(self, key, value):
+        pass
+    
+    def set_many(self, values):
+        pass
+    
+    def clear(self):
+        pass
+
+def create_cache(config, name='RESPONSE_CACHE'):
+    """
+    Build the cache backend selected by a config setting
+    
+    Args:
+        config: App config
+        name: Setting naming the backend; <name>_TTL, <name>_MAX_ENTRIES
+            and <name>_REDIS_URL configure it
+    """
+    backend = config.get(name, 'simple')
+    ttl = config.get(f'{name}_TTL', 300)
+    
+    if backend == 'simple':
+        return LRUCache(config.get(f'{name}_MAX_ENTRIES', 1024), ttl)
+    if backend == 'redis':
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(f"{name}='redis' requires the redis package") from e
+        prefix = f"eatr:{name.lower().removesuffix('_cache')}:"
+        return RedisCache(redis.Redis.from_url(config[f'{name}_REDIS_URL']), ttl, prefix)
+    if backend == 'none':
+        return NullCache()
+    raise ValueError(f"Unknown {name} backend: {backend}")
+
+def init_cache(app):
+    """Attach the response cache to the app"""
+    app.extensions['response_cache'] = create_cache(app.config)
+
+def get_cache():
+    """Get the response cache for the current app"""
+    return current_app.extensions['response_cache']
+
+def cached_response(view):
+    """
+    Cache a GET view's successful responses and answer conditional
+    requests with 304 Not Modified
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        cache = get_cache()
+        key = request.full_path
+        
+        cached = cache.get(key)
+        if cached is None:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            response.add_etag()
+            cache.set(key, (response.get_data(), response.mimetype, response.get_etag()[0]))
+        else:
+            body, mimetype, etag = cached
+            response = current_app.response_class(body, mimetype=mimetype)
+            response.set_etag(etag)
+        
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    return wrapper
+
+# Invalidate cached responses when a commit writes recipes or tags
+CACHED_MODELS = (Recipe, Tag)
+
+# Other in-process caches of recipe data, cleared alongside responses
+recipe_change_callbacks = []
+
+def on_recipes_changed(callback):
+    """Register a function to call after a commit that writes recipes"""
+    recipe_change_callbacks.append(callback)
+    return callback
+
+@event.listens_for(Session, 'after_flush')
+def track_recipe_writes(session, flush_context):
+    """Remember that this transaction changed cached data"""
+    changed = session.new | session.dirty | session.deleted
+    if any(isinstance(obj, CACHED_MODELS) for obj in changed):
+        session.info['response_cache_stale'] = True
+
+def recipes_changed():
+    """
+    Clear every cache of recipe data. Called automatically after ORM
+    commits; call it directly after Core-level bulk writes.
+    """
+    for callback in recipe_change_callbacks:
+        callback()
+    if has_app_context():
+        cache = current_app.extensions.get('response_cache')
+        if cache:
+            cache.clear()
+
+@event.listens_for(Session, 'after_commit')
+def clear_after_recipe_writes(session):
+    """Clear cached responses once recipe changes are committed"""
+    if session.info.pop('response_cache_stale', False):
+        recipes_changed()
+
+@event.listens_for(Session, 'after_rollback')
+def forget_rolled_back_writes(session):
+    """Rolled-back changes never reach the cache"""
+    session.info.pop('response_cache_stale', None)
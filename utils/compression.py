@@ -0,0 +1,189 @@
+"""
+Response compression
+
+Text responses of at least COMPRESS_MIN_SIZE bytes are brotli- or
+gzip-encoded to match the client's Accept-Encoding; streamed responses
+are compressed chunk by chunk. Static files are never compressed per
+request: flask build-assets writes .br/.gz siblings once and those are
+sent to clients that accept them.
+"""
+import gzip
+import mimetypes
+import os
+import zlib
+from flask import request, send_from_directory
+from werkzeug.security import safe_join
+from utils.cache import LRUCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Mimetypes worth compressing
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'application/x-ndjson',
+    'application/xml', 'image/svg+xml'
+}
+
+# Fast settings per request, smallest output for files compressed once
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+
+# Suffix of the precompressed sibling of a static file
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+# Compressed bodies of cached responses, keyed on (ETag, encoding)
+COMPRESSED_CACHE_ENTRIES = 128
+
+def available_encodings():
+    """Encodings this process can write, preferred first"""
+    return ['br', 'gzip'] if brotli else ['gzip']
+
+def choose_encoding(encodings):
+    """The client's most preferred encoding of those given, or None"""
+    accepted = request.accept_encodings
+    best = max(encodings, key=lambda name: accepted[name], default=None)
+    return best if best and accepted[best] > 0 else None
+
+def compress(data, encoding, level=None):
+    """Compress bytes with 'br' or 'gzip'"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=level or BROTLI_QUALITY)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=level or GZIP_LEVEL, mtime=0)
+
+def compress_stream(chunks, encoding):
+    """
+    Compress a streamed body, flushing after every chunk so clients
+    receive data as soon as the view yields it
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        process, finish = compressor.compress, compressor.flush
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+    
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            if chunk:
+                yield process(chunk) + flush()
+        yield finish()
+    finally:
+        # Close the view's generator (and its request context) early if
+        # the client disconnects
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+def is_compressible(filename):
+    """Whether a file's type is worth compressing"""
+    return mimetypes.guess_type(filename)[0] in COMPRESSIBLE_MIMETYPES
+
+def precompress(path):
+    """
+    Write .br/.gz siblings of a static file
+    
+    Siblings that would not be smaller than the file are not written.
+    
+    Returns:
+        Number of files written
+    """
+    written = 0
+    with open(path, 'rb') as f:
+        data = f.read()
+    for encoding in available_encodings():
+        target = path + SUFFIXES[encoding]
+        if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+            continue
+        level = STATIC_BROTLI_QUALITY if encoding == 'br' else STATIC_GZIP_LEVEL
+        compressed = compress(data, encoding, level)
+        if len(compressed) >= len(data):
+            continue
+        with open(target + '.tmp', 'wb') as f:
+            f.write(compressed)
+        os.replace(target + '.tmp', target)
+        written += 1
+    return written
+
+def init_compression(app):
+    """Compress dynamic responses and serve precompressed static files"""
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    compressed_cache = LRUCache(COMPRESSED_CACHE_ENTRIES, ttl=app.config.get('RESPONSE_CACHE_TTL', 300))
+    default_send_static_file = app.send_static_file
+    
+    def send_static_file(filename):
+        original = safe_join(app.static_folder, filename)
+        if original and os.path.isfile(original):
+            present = [
+                encoding for encoding, suffix in SUFFIXES.items()
+                if os.path.isfile(original + suffix)
+                and os.path.getmtime(original + suffix) >= os.path.getmtime(original)
+            ]
+            encoding = choose_encoding(present) if present else None
+            if encoding:
+                response = send_from_directory(
+                    app.static_folder, filename + SUFFIXES[encoding],
+                    mimetype=mimetypes.guess_type(filename)[0],
+                    max_age=app.get_send_file_max_age(filename)
+                )
+                response.headers['Content-Encoding'] = encoding
+                response.vary.add('Accept-Encoding')
+                return response
+        response = default_send_static_file(filename)
+        if original and is_compressible(original):
+            response.vary.add('Accept-Encoding')
+        return response
+    
+    app.send_static_file = send_static_file
+    
+    if not app.config.get('COMPRESS_RESPONSES'):
+        return
+    
+    @app.after_request
+    def compress_response(response):
+        if response.status_code != 200 or response.direct_passthrough \
+                or 'Content-Encoding' in response.headers \
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        
+        if response.is_streamed:
+            response.vary.add('Accept-Encoding')
+            encoding = choose_encoding(available_encodings())
+            if encoding:
+                response.response = compress_stream(response.response, encoding)
+                response.headers.pop('Content-Length', None)
+                response.headers['Content-Encoding'] = encoding
+            return response
+        
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(available_encodings())
+        if not encoding:
+            return response
+        
+        # Cached responses repeat the same body under a strong ETag, so
+        # compress each one once per encoding
+        etag, weak = response.get_etag()
+        key = (etag, encoding) if etag and not weak else None
+        compressed = compressed_cache.get(key) if key else None
+        if compressed is None:
+            compressed = compress(body, encoding)
+            if key:
+                compressed_cache.set(key, compressed)
+        
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            # Weak, as the bytes differ per encoding; If-None-Match
+            # still matches it, so 304s keep working
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,87 @@
+"""
+Request-scoped current user resolution
+
+The user id is kept in Flask's signed session cookie, and user profiles
+(username and goals) are cached in-process. The hot APIs resolve the
+user without a query once the cache is warm, and nothing is written to
+the database while resolving.
+"""
+from flask import g, session
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+from models.user import User
+from utils.cache import LRUCache
+
+DEFAULT_USERNAME = 'demo_user'
+
+# user id -> User.to_dict(), bounded so goal changes in other workers show up
+profile_cache = LRUCache(max_entries=1024, ttl=60)
+
+def get_profile(user_id):
+    """
+    Get a user's profile dictionary, loading it at most once per TTL
+    
+    Returns:
+        User.to_dict() result, or None if the user does not exist
+    """
+    profile = profile_cache.get(user_id)
+    if profile is None:
+        user = db.session.get(User, user_id)
+        if not user:
+            return None
+        profile = user.to_dict()
+        profile_cache.set(user_id, profile)
+    return profile
+
+def current_user_profile():
+    """
+    Get the profile of the user making this request
+    
+    Uses the user id from the session, falling back to the default
+    (lowest id) user for new visitors. Resolved once per request.
+    
+    Returns:
+        Profile dictionary, or None if there are no users
+    """
+    if 'current_user_profile' in g:
+        return g.current_user_profile
+    
+    profile = None
+    user_id = session.get('user_id')
+    if user_id is not None:
+        profile = get_profile(user_id)
+    
+    if profile is None:
+        default_id = db.session.scalar(db.select(User.id).order_by(User.id).limit(1))
+        if default_id is not None:
+            profile = get_profile(default_id)
+            session['user_id'] = default_id
+    
+    g.current_user_profile = profile
+    return profile
+
+def ensure_default_user():
+    """Create the demo user at startup so read requests never have to"""
+    if not db.session.scalar(db.select(User.id).limit(1)):
+        db.session.add(User(username=DEFAULT_USERNAME))
+        db.session.commit()
+
+@event.listens_for(Session, 'after_flush')
+def track_user_writes(session, flush_context):
+    """Remember users changed in this transaction"""
+    changed = session.new | session.dirty | session.deleted
+    user_ids = {obj.id for obj in changed if isinstance(obj, User)}
+    if user_ids:
+        session.info.setdefault('changed_user_ids', set()).update(user_ids)
+
+@event.listens_for(Session, 'after_commit')
+def clear_changed_profiles(session):
+    """Drop cached profiles of users changed by a commit"""
+    for user_id in session.info.pop('changed_user_ids', ()):
+        profile_cache.delete(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def forget_rolled_back_users(session):
+    """Rolled-back changes never reach the cache"""
+    session.info.pop('changed_user_ids', None)
@@ -0,0 +1,126 @@
+"""
+Rendered-fragment cache for recipe markup
+
+Recipe cards and the recipe detail body are rendered once per recipe
+version and reused by later requests, and by every worker with the redis
+backend. Keys combine the fragment template and its arguments, the
+recipe id and version (bumped by every UPDATE of the row), a hash of the
+recipe's column values, a hash of the fragment and macro templates and
+the thumbnail manifest's mtime, so a changed recipe, template or set of
+thumbnails simply misses and nothing has to be invalidated. The value
+hash matters because id and version alone can repeat: SQLite reuses the
+id of a deleted last row, and a new row starts again at version 1.
+"""
+import hashlib
+import os
+import threading
+from datetime import datetime
+from flask import current_app, render_template
+from markupsafe import Markup
+from sqlalchemy import inspect
+from utils.cache import create_cache
+
+# Template directories whose contents fragments are rendered from
+FRAGMENT_TEMPLATE_DIRS = ('fragments', 'macros')
+
+class FragmentStats:
+    """Thread-safe hit and miss counts per fragment template for this process"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self.since = datetime.utcnow()
+            self.templates = {}
+    
+    def add(self, template, hits, misses):
+        with self._lock:
+            counts = self.templates.setdefault(template, {'hits': 0, 'misses': 0})
+            counts['hits'] += hits
+            counts['misses'] += misses
+    
+    def to_dict(self):
+        """Counts and hit rate per template"""
+        with self._lock:
+            templates = {
+                template: dict(counts, hit_rate=round(counts['hits'] / (counts['hits'] + counts['misses']), 3))
+                for template, counts in sorted(self.templates.items())
+            }
+        return {'since': self.since.isoformat(), 'templates': templates}
+
+def templates_hash(template_folder):
+    """Short hash of every fragment and macro template"""
+    digest = hashlib.sha256()
+    for directory in FRAGMENT_TEMPLATE_DIRS:
+        for root, dirs, files in os.walk(os.path.join(template_folder, directory)):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                digest.update(os.path.relpath(path, template_folder).encode())
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+def recipe_fingerprint(recipe):
+    """
+    Short hash of a recipe's loaded column values
+    
+    Columns that were not loaded are left out rather than fetched.
+    """
+    state = inspect(recipe)
+    values = [
+        (attr.key, state.dict[attr.key])
+        for attr in state.mapper.column_attrs if attr.key in state.dict
+    ]
+    return hashlib.sha256(repr(values).encode()).hexdigest()[:12]
+
+def fragment_key(template, params, recipe, stamp):
+    """Cache key for one recipe rendered by a fragment template"""
+    args = ','.join(f'{name}={value!r}' for name, value in sorted(params.items()))
+    return f'{template}({args}):{recipe.id}:{recipe.version}:{recipe_fingerprint(recipe)}:{stamp}'
+
+def recipe_fragments(template, recipes, **params):
+    """
+    Render a fragment template once per recipe, reusing cached markup
+    
+    Args:
+        template: Template rendered with `recipe` and params in its context
+        recipes: Recipe objects
+        **params: Other context for the template; part of the cache key
+    
+    Returns:
+        List of Markup, one per recipe
+    """
+    cache = current_app.extensions['fragment_cache']
+    manifest = current_app.extensions['image_manifest']
+    manifest.get()
+    stamp = f"{current_app.extensions['fragment_templates_hash']}:{manifest.mtime}"
+    
+    keys = [fragment_key(template, params, recipe, stamp) for recipe in recipes]
+    fragments = cache.get_many(keys)
+    
+    rendered = {}
+    for i, (recipe, key) in enumerate(zip(recipes, keys)):
+        if fragments[i] is None:
+            fragments[i] = rendered[key] = render_template(template, recipe=recipe, **params)
+    if rendered:
+        cache.set_many(rendered)
+    
+    current_app.extensions['fragment_stats'].add(template, len(keys) - len(rendered), len(rendered))
+    return [Markup(fragment) for fragment in fragments]
+
+def recipe_fragment(template, recipe, **params):
+    """Render a fragment template for one recipe, reusing cached markup"""
+    return recipe_fragments(template, [recipe], **params)[0]
+
+def init_fragments(app):
+    """Attach the fragment cache and expose its helpers to templates"""
+    app.extensions['fragment_cache'] = create_cache(app.config, 'FRAGMENT_CACHE')
+    app.extensions['fragment_stats'] = FragmentStats()
+    app.extensions['fragment_templates_hash'] = templates_hash(
+        os.path.join(app.root_path, app.template_folder)
+    )
+    app.add_template_global(recipe_fragments)
+    app.add_template_global(recipe_fragment)
@@ -0,0 +1,102 @@
+"""
+Nutrition history aggregation over arbitrary date ranges
+"""
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, Date, cast
+from models import db
+from models.meal_plan import MealPlan
+from models.daily_nutrition import DailyNutrition
+
+GRANULARITIES = ('day', 'week', 'month')
+
+def period_expression(granularity):
+    """
+    SQL expression mapping a meal date to the first day of its period.
+    Weeks start on Monday, matching the meal planner.
+    """
+    if granularity == 'day':
+        return MealPlan.date
+    
+    if db.engine.dialect.name == 'postgresql':
+        return cast(func.date_trunc(granularity, MealPlan.date), Date)
+    
+    if granularity == 'week':
+        # Next Sunday (or today if Sunday), then back to Monday
+        return func.date(MealPlan.date, 'weekday 0', '-6 days')
+    return func.date(MealPlan.date, 'start of month')
+
+def period_start(day, granularity):
+    """Python counterpart of period_expression()"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+def next_period(start, granularity):
+    """Get the first day of the period after the one starting at start"""
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+def as_date(value):
+    """Normalize a period value returned by the database driver"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+def iter_history(user_id, start_date, end_date, granularity, batch_size=500):
+    """
+    Aggregate a user's nutrition per period with a single GROUP BY query
+    
+    Rows are streamed from the database in batches and periods with no
+    meals are filled with zeros, so the output has one entry per period.
+    
+    Yields:
+        Dictionaries with period_start, calories, macros and meal_count
+    """
+    period = period_expression(granularity)
+    stmt = DailyNutrition.totals_select(period).where(
+        MealPlan.user_id == user_id,
+        MealPlan.date >= start_date,
+        MealPlan.date <= end_date
+    ).order_by(period)
+    
+    rows = db.session.execute(
+        stmt, execution_options={'yield_per': batch_size}
+    ).mappings()
+    
+    current = period_start(start_date, granularity)
+    for row in rows:
+        row_start = as_date(row['date'])
+        while current < row_start:
+            yield empty_period(current)
+            current = next_period(current, granularity)
+        yield {
+            'period_start': row_start.isoformat(),
+            'calories': row['calories'],
+            'protein': row['protein'],
+            'carbs': row['carbs'],
+            'fats': row['fats'],
+            'meal_count': row['meal_count']
+        }
+        current = next_period(row_start, granularity)
+    
+    while current <= end_date:
+        yield empty_period(current)
+        current = next_period(current, granularity)
+
+def empty_period(start):
+    """History entry for a period with nothing logged"""
+    return {
+        'period_start': start.isoformat(),
+        'calories': 0,
+        'protein': 0,
+        'carbs': 0,
+        'fats': 0,
+        'meal_count': 0
+    }
@@ -0,0 +1,177 @@
+"""
+Responsive recipe image thumbnails
+
+Source images under static/ are resized to several widths in WebP (and
+AVIF when the pillow-avif-plugin package is installed) by a process pool.
+Thumbnail filenames include a hash of the source file, so they never
+change in place and can be cached forever; a manifest maps each source
+URL to its variants for templates to build srcset attributes.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app, request
+from utils.manifests import ManifestCache, file_hash, read_manifest, write_manifest
+
+# Output formats in order of preference, with encoder options
+FORMATS = {
+    'avif': {'quality': 50},
+    'webp': {'quality': 80, 'method': 6},
+}
+
+THUMBNAIL_DIR = os.path.join('images', 'thumbs')
+MANIFEST_NAME = 'manifest.json'
+
+# Hex digits of the source hash in thumbnail filenames
+HASH_LENGTH = 12
+
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Far-future caching for hashed thumbnails
+THUMBNAIL_MAX_AGE = 365 * 24 * 60 * 60
+
+def available_formats():
+    """Formats Pillow can write here; AVIF needs pillow-avif-plugin"""
+    from PIL import features
+    formats = []
+    try:
+        import pillow_avif  # noqa: F401 - registers the AVIF encoder
+        formats.append('avif')
+    except ImportError:
+        pass
+    if features.check('webp'):
+        formats.append('webp')
+    return formats
+
+def make_thumbnails(source_path, output_dir, widths, formats):
+    """
+    Write every width and format of one source image
+    
+    Runs in a worker process. Widths above the original are skipped, so
+    small sources get a single variant at their own width.
+    
+    Returns:
+        Manifest entry with the source hash, size and variant filenames
+    """
+    from PIL import Image, ImageOps
+    if 'avif' in formats:
+        import pillow_avif  # noqa: F401
+    
+    content_hash = file_hash(source_path, HASH_LENGTH)
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        targets = sorted({min(width, image.width) for width in widths})
+        variants = {name: [] for name in formats}
+        for width in targets:
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for name in formats:
+                filename = f'{stem}.{content_hash}.{width}.{name}'
+                path = os.path.join(output_dir, filename)
+                if not os.path.exists(path):
+                    resized.save(path, name.upper(), **FORMATS[name])
+                variants[name].append([width, filename])
+        return {'hash': content_hash, 'width': image.width, 'height': image.height, 'variants': variants}
+
+def find_sources(static_folder):
+    """Static URLs and paths of source images, skipping generated thumbnails"""
+    thumbnail_dir = os.path.join(static_folder, THUMBNAIL_DIR)
+    for root, dirs, files in os.walk(os.path.join(static_folder, 'images')):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != thumbnail_dir]
+        for filename in sorted(files):
+            if filename.lower().endswith(SOURCE_EXTENSIONS):
+                path = os.path.join(root, filename)
+                yield static_url(static_folder, path), path
+
+def static_url(static_folder, path):
+    """URL Flask serves a static file at"""
+    return '/static/' + os.path.relpath(path, static_folder).replace(os.sep, '/')
+
+def build_thumbnails(static_folder, widths, urls=None, workers=None, force=False):
+    """
+    Generate thumbnails and update the manifest
+    
+    Args:
+        static_folder: The app's static directory
+        widths: Thumbnail widths in pixels
+        urls: Only process these /static/ image URLs (default: all images)
+        workers: Process pool size (default: CPU count)
+        force: Regenerate sources whose hash has not changed
+    
+    Returns:
+        Tuple of (images processed, images skipped as up to date)
+    """
+    output_dir = os.path.join(static_folder, THUMBNAIL_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = read_manifest(manifest_path)
+    formats = available_formats()
+    
+    sources = list(find_sources(static_folder))
+    if urls is not None:
+        urls = set(urls)
+        sources = [(url, path) for url, path in sources if url in urls]
+    
+    pending = []
+    for url, path in sources:
+        entry = manifest.get(url)
+        up_to_date = entry and entry['hash'] == file_hash(path, HASH_LENGTH) and \
+            set(entry['variants']) == set(formats) and \
+            all(os.path.exists(os.path.join(output_dir, filename))
+                for variants in entry['variants'].values() for _, filename in variants)
+        if force or not up_to_date:
+            pending.append((url, path))
+    
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            entries = pool.map(
+                make_thumbnails,
+                [path for _, path in pending],
+                [output_dir] * len(pending),
+                [tuple(widths)] * len(pending),
+                [formats] * len(pending)
+            )
+            for (url, _), entry in zip(pending, entries):
+                manifest[url] = entry
+        write_manifest(manifest_path, manifest)
+    
+    return len(pending), len(sources) - len(pending)
+
+def image_srcsets(url):
+    """
+    srcset strings for an image URL, e.g. {'webp': '/static/... 320w, ...'}
+    
+    Returns an empty dictionary for images without thumbnails.
+    """
+    entry = current_app.extensions['image_manifest'].get().get(url) if url else None
+    if not entry:
+        return {}
+    prefix = '/static/' + THUMBNAIL_DIR.replace(os.sep, '/') + '/'
+    return {
+        name: ', '.join(f'{prefix}{filename} {width}w' for width, filename in entry['variants'][name])
+        for name in FORMATS if entry['variants'].get(name)
+    }
+
+def init_images(app):
+    """Expose image_srcsets to templates and cache thumbnails forever"""
+    app.extensions['image_manifest'] = ManifestCache(os.path.join(app.static_folder, THUMBNAIL_DIR, MANIFEST_NAME))
+    app.add_template_global(image_srcsets)
+    
+    default_max_age = app.get_send_file_max_age
+    thumbnail_prefix = THUMBNAIL_DIR.replace(os.sep, '/') + '/'
+    
+    def get_send_file_max_age(filename):
+        if filename and filename.replace(os.sep, '/').startswith(thumbnail_prefix) \
+                and not filename.endswith(MANIFEST_NAME):
+            return THUMBNAIL_MAX_AGE
+        return default_max_age(filename)
+    
+    app.get_send_file_max_age = get_send_file_max_age
+    
+    @app.after_request
+    def mark_thumbnails_immutable(response):
+        if request.path.startswith(app.static_url_path + '/' + thumbnail_prefix) \
+                and response.cache_control.max_age == THUMBNAIL_MAX_AGE:
+            response.cache_control.immutable = True
+        return response
@@ -0,0 +1,50 @@
+"""
+JSON manifests of generated static files
+
+Thumbnails (utils/images.py) and fingerprinted assets (utils/assets.py)
+both name their output after a hash of the source file and record the
+names in a JSON manifest that running apps read.
+"""
+import hashlib
+import json
+import os
+
+def file_hash(path, length):
+    """Short sha256 content hash of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:length]
+
+def read_manifest(path):
+    """Load a manifest, or an empty one if it does not exist"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def write_manifest(path, manifest):
+    """Replace a manifest atomically so running apps never read half of it"""
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+class ManifestCache:
+    """A JSON manifest file, reloaded when the file changes"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.mtime = None
+        self.manifest = {}
+    
+    def get(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return {}
+        if mtime != self.mtime:
+            with open(self.path) as f:
+                self.manifest = json.load(f)
+            self.mtime = mtime
+        return self.manifest
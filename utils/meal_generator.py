@@ -0,0 +1,101 @@
+"""
+Automatic meal plan generation targeting daily nutrition goals
+"""
+import numpy as np
+
+# Recipe category used to fill each meal slot
+MEAL_CATEGORIES = {
+    'breakfast': 'Breakfast',
+    'lunch': 'Lunch',
+    'dinner': 'Dinner'
+}
+
+# Share of the daily goals each meal starts out aiming for
+MEAL_SHARES = {
+    'breakfast': 0.3,
+    'lunch': 0.35,
+    'dinner': 0.35
+}
+
+# Nutrients scored against the goals, and how much each one counts
+GOAL_COLUMNS = ('calories', 'protein', 'carbs', 'fats')
+GOAL_WEIGHTS = np.array([2.0, 1.0, 1.0, 1.0])
+
+def generate_plan(matrix, goals, days, fixed=None, seed=None,
+                  rounds=4, repeat_penalty=0.05, jitter=0.01):
+    """
+    Choose a recipe for every open meal slot over several days so that
+    each day's totals land close to the goals
+    
+    Each day starts from the recipe nearest to each meal's share of the
+    goals, then runs coordinate descent: every slot in turn is re-picked
+    as the best recipe given the other slots, scored over its whole
+    category at once. Recipes already used in the plan are penalized
+    and a small random jitter varies plans between runs.
+    
+    Args:
+        matrix: NutritionMatrix of candidate recipes
+        goals: Dictionary with calories, protein, carbs and fats goals
+        days: Number of days to plan
+        fixed: Optional list (one per day) of {meal_type: recipe_id}
+            for meals that are already planned and must be kept
+        seed: Optional random seed for reproducible plans
+    
+    Returns:
+        List (one per day) of {meal_type: recipe_id} for the open slots
+    """
+    if len(matrix) == 0:
+        return [{} for _ in range(days)]
+    
+    goal = np.array([goals[name] for name in GOAL_COLUMNS], dtype=np.float64)
+    goal[goal <= 0] = 1.0
+    values = np.column_stack([matrix.column(name) for name in GOAL_COLUMNS]) / goal
+    
+    all_rows = np.arange(len(matrix))
+    candidates = {}
+    for meal_type, category in MEAL_CATEGORIES.items():
+        rows = matrix.category_rows(category)
+        candidates[meal_type] = rows if len(rows) else all_rows
+    
+    rng = np.random.default_rng(seed)
+    usage = np.zeros(len(matrix))
+    plan = []
+    
+    for day in range(days):
+        fixed_meals = (fixed[day] if fixed else None) or {}
+        fixed_rows = matrix.rows_for_ids(list(fixed_meals.values()))
+        fixed_total = values[fixed_rows[fixed_rows >= 0]].sum(axis=0)
+        open_slots = [meal_type for meal_type in MEAL_CATEGORIES if meal_type not in fixed_meals]
+        noise = rng.random(len(matrix)) * jitter
+        
+        def best_row(meal_type, target):
+            rows = candidates[meal_type]
+            error = (((values[rows] - target) ** 2) * GOAL_WEIGHTS).sum(axis=1)
+            error += repeat_penalty * usage[rows] + noise[rows]
+            return rows[np.argmin(error)]
+        
+        # Start from each meal's share of the goals
+        choice = {
+            meal_type: best_row(meal_type, MEAL_SHARES[meal_type])
+            for meal_type in open_slots
+        }
+        
+        # Re-pick each slot given the rest of the day until nothing changes
+        for _ in range(rounds):
+            changed = False
+            for meal_type in open_slots:
+                rest = fixed_total + sum(
+                    values[row] for other, row in choice.items() if other != meal_type
+                )
+                row = best_row(meal_type, 1.0 - rest)
+                if row != choice[meal_type]:
+                    choice[meal_type] = row
+                    changed = True
+            if not changed:
+                break
+        
+        for row in choice.values():
+            usage[row] += 1
+        plan.append({meal_type: int(matrix.ids[row]) for meal_type, row in choice.items()})
+    
+    return plan
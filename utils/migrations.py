@@ -0,0 +1,183 @@
+"""
+Schema upgrades for databases created by older versions of the app
+"""
+from contextlib import contextmanager
+from flask import current_app
+from sqlalchemy import func, inspect, text
+from models import db
+from models.daily_nutrition import DailyNutrition
+from models.meal_plan import MealPlan
+from models.recipe import Recipe, decode_json_field
+from models.tag import Tag, recipe_tags
+from utils.search import create_search_index
+
+# Arbitrary application-wide key for pg_advisory_lock
+SCHEMA_LOCK_KEY = 0x45415452
+
+# Copies of the meals removed by remove_duplicate_meal_slots
+DUPLICATE_MEALS_TABLE = 'meal_plans_duplicates'
+
+@contextmanager
+def schema_lock():
+    """
+    Serialize startup schema work between instances sharing a database
+    
+    On PostgreSQL this holds a session advisory lock, so concurrently
+    starting instances create tables, indexes and seed data one at a
+    time. SQLite databases are not shared and need no lock.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        yield
+        return
+    
+    with db.engine.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {'key': SCHEMA_LOCK_KEY})
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': SCHEMA_LOCK_KEY})
+            connection.commit()
+
+def upgrade_database():
+    """
+    Bring an existing database up to the current schema.
+    
+    db.create_all() only creates missing tables, so indexes added to
+    existing tables, and data derived from older columns, are created
+    here. Safe to run on every startup.
+    """
+    add_missing_columns(Recipe.__table__)
+    create_missing_indexes(Recipe.__table__)
+    create_missing_indexes(MealPlan.__table__, check_unique=meal_slots_are_unique)
+    create_search_index()
+    backfill_recipe_tags()
+    backfill_daily_nutrition()
+
+def add_missing_columns(table):
+    """
+    Add columns declared on a model but missing from its table
+    
+    New NOT NULL columns need a server_default to fill existing rows.
+    """
+    existing = {column['name'] for column in inspect(db.engine).get_columns(table.name)}
+    
+    with db.engine.begin() as connection:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            definition = f'{column.name} {column.type.compile(db.engine.dialect)}'
+            if column.server_default is not None:
+                definition += f' DEFAULT {column.server_default.arg}'
+            if not column.nullable:
+                definition += ' NOT NULL'
+            connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {definition}'))
+
+def create_missing_indexes(table, check_unique=None):
+    """
+    Create indexes declared on a model but missing from its table
+    
+    Args:
+        table: SQLAlchemy Table to upgrade
+        check_unique: Optional callable given each missing unique index;
+            the index is skipped if it returns False
+    """
+    existing = {index['name'] for index in inspect(db.engine).get_indexes(table.name)}
+    
+    for index in table.indexes:
+        if index.name in existing:
+            continue
+        if index.unique and check_unique and not check_unique(index):
+            continue
+        index.create(db.engine)
+
+def duplicate_meal_slots():
+    """Meals that are not the most recent in their (user, date, meal_type) slot"""
+    latest_ids = db.select(func.max(MealPlan.id)).group_by(
+        MealPlan.user_id,
+        MealPlan.date,
+        MealPlan.meal_type
+    )
+    return db.select(MealPlan.__table__).where(MealPlan.id.not_in(latest_ids))
+
+def meal_slots_are_unique(index):
+    """
+    Whether the unique meal slot index can be created
+    
+    Older databases could hold several meals per slot. Those are never
+    deleted on startup; the index is skipped with a warning until
+    `flask dedupe-meal-plans` is run.
+    """
+    duplicates = db.session.scalar(
+        db.select(func.count()).select_from(duplicate_meal_slots().subquery())
+    )
+    if duplicates:
+        current_app.logger.warning(
+            "%d meal_plans rows share a (user, date, meal_type) slot with a newer meal, "
+            "so %s was not created and saving planned or logged meals will fail. "
+            "Run `flask dedupe-meal-plans` to back them up to %s and remove them.",
+            duplicates, index.name, DUPLICATE_MEALS_TABLE
+        )
+    return not duplicates
+
+def remove_duplicate_meal_slots():
+    """
+    Keep only the most recent meal for each (user, date, meal_type) slot
+    
+    Removed rows are first copied to the meal_plans_duplicates table, the
+    daily_nutrition rollup of the affected days is recomputed and the
+    unique slot index is created.
+    
+    Returns:
+        Number of meals removed
+    """
+    duplicates = duplicate_meal_slots().subquery()
+    days = db.session.execute(
+        db.select(duplicates.c.user_id, duplicates.c.date).distinct()
+    ).all()
+    
+    removed = 0
+    if days:
+        if not inspect(db.engine).has_table(DUPLICATE_MEALS_TABLE):
+            db.session.execute(text(
+                f'CREATE TABLE {DUPLICATE_MEALS_TABLE} AS SELECT * FROM {MealPlan.__tablename__} WHERE 1 = 0'
+            ))
+        backup = db.table(DUPLICATE_MEALS_TABLE, *(db.column(column.name) for column in MealPlan.__table__.columns))
+        db.session.execute(db.insert(backup).from_select(list(duplicates.c.keys()), db.select(duplicates)))
+        removed = MealPlan.query.filter(
+            MealPlan.id.in_(db.select(duplicates.c.id))
+        ).delete(synchronize_session=False)
+        
+        dates_by_user = {}
+        for user_id, date in days:
+            dates_by_user.setdefault(user_id, set()).add(date)
+        for user_id, dates in dates_by_user.items():
+            DailyNutrition.refresh_days(user_id, dates)
+    db.session.commit()
+    
+    create_missing_indexes(MealPlan.__table__)
+    return removed
+
+def backfill_recipe_tags():
+    """Populate the recipe_tags index from tags_json for untagged databases"""
+    if db.session.execute(db.select(recipe_tags.c.recipe_id).limit(1)).first():
+        return
+    
+    rows = db.session.execute(
+        db.select(Recipe.id, Recipe.tags_json).where(Recipe.tags_json.isnot(None))
+    ).all()
+    recipe_tag_names = [(recipe_id, decode_json_field(tags_json)) for recipe_id, tags_json in rows]
+    if not any(names for _, names in recipe_tag_names):
+        return
+    
+    links = Tag.link_recipes(recipe_tag_names)
+    db.session.commit()
+    
+    print(f"Indexed {links} recipe tags")
+
+def backfill_daily_nutrition():
+    """Build the daily_nutrition rollup for databases that predate it"""
+    if DailyNutrition.query.first() or not MealPlan.query.first():
+        return
+    
+    rows = DailyNutrition.rebuild()
+    print(f"Built {rows} daily nutrition rows")
@@ -1,5 +1,9 @@
 """
 Nutrition calculation utilities
+
+Each scalar function has a *_batch variant that takes NumPy arrays (or
+anything array-like) and returns arrays, for whole weeks or catalogs.
+NumPy is imported inside those so the web app starts without it.
 """
 
 def calculate_macros_percentage(protein, carbs, fats):
@@ -62,6 +66,79 @@ def calculate_calories_from_macros(protein, carbs, fats):
     """
     return (protein * 4) + (carbs * 4) + (fats * 9)
 
+def calculate_macros_percentage_batch(protein, carbs, fats):
+    """
+    Vectorized calculate_macros_percentage
+    
+    Args:
+        protein: Array of protein in grams
+        carbs: Array of carbs in grams
+        fats: Array of fats in grams
+    
+    Returns:
+        Dictionary with a percentage array for each macro; rows with no
+        calories get 0 for every macro, as in the scalar version
+    """
+    import numpy as np
+    protein_cals = np.asarray(protein, dtype=np.float64) * 4
+    carbs_cals = np.asarray(carbs, dtype=np.float64) * 4
+    fats_cals = np.asarray(fats, dtype=np.float64) * 9
+    
+    total_cals = protein_cals + carbs_cals + fats_cals
+    empty = total_cals == 0
+    safe_total = np.where(empty, 1, total_cals)
+    
+    return {
+        name: np.where(empty, 0, round_batch((cals / safe_total) * 100, 1))
+        for name, cals in (('protein', protein_cals), ('carbs', carbs_cals), ('fats', fats_cals))
+    }
+
+def round_batch(values, ndigits):
+    """
+    Round an array exactly like Python's round()
+    
+    np.round scales by 10**ndigits first, which can break near-ties the
+    other way; those few values are re-rounded with round().
+    """
+    import numpy as np
+    values = np.asarray(values, dtype=np.float64)
+    result = np.round(values, ndigits)
+    scaled = values * 10 ** ndigits
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        result.flat[i] = round(float(values.flat[i]), ndigits)
+    return result
+
+def calculate_daily_remaining_batch(consumed, goals):
+    """
+    Vectorized calculate_daily_remaining
+    
+    Args:
+        consumed: Dictionary of arrays (or scalars) of consumed values
+        goals: Dictionary of arrays (or scalars) of goal values
+    
+    Returns:
+        Dictionary with an array of remaining values per nutrient
+    """
+    import numpy as np
+    return {
+        name: np.asarray(goals.get(name, 0), dtype=np.float64)
+        - np.asarray(consumed.get(name, 0), dtype=np.float64)
+        for name in ('calories', 'protein', 'carbs', 'fats')
+    }
+
+def calculate_calories_from_macros_batch(protein, carbs, fats):
+    """
+    Vectorized calculate_calories_from_macros
+    
+    Returns:
+        Array of total calories
+    """
+    import numpy as np
+    return (np.asarray(protein, dtype=np.float64) * 4) \
+        + (np.asarray(carbs, dtype=np.float64) * 4) \
+        + (np.asarray(fats, dtype=np.float64) * 9)
+
 def get_macro_color(macro_type):
     """
     Get color code for macro type for visualization
@@ -0,0 +1,220 @@
+"""
+Streaming bulk recipe import from CSV or JSONL files
+
+Rows are read one at a time, validated and inserted in batches with a
+single executemany per batch. After each committed batch the number of
+input rows processed is written to a checkpoint file next to the input,
+so an interrupted import resumes where it stopped.
+"""
+import csv
+import json
+import math
+import os
+import time
+from models import db
+from models.recipe import Recipe, encode_json_field
+from models.tag import Tag
+from utils.cache import recipes_changed
+from utils.nutrition_calc import calculate_calories_from_macros
+
+FORMATS = ('csv', 'jsonl')
+
+NUMBER_FIELDS = ('calories', 'protein', 'carbs', 'fats', 'fiber')
+INTEGER_FIELDS = ('prep_time', 'cook_time', 'servings')
+TEXT_FIELDS = ('name', 'description', 'image_url', 'category')
+LIST_FIELDS = ('ingredients', 'instructions', 'tags')
+
+class ImportStats:
+    """Counters reported while and after importing"""
+    
+    def __init__(self, resumed_from=0):
+        self.resumed_from = resumed_from
+        self.processed = resumed_from
+        self.imported = 0
+        self.invalid = 0
+        self.errors = []
+        # Local /static/ images referenced by imported rows
+        self.image_urls = set()
+        self.started_at = time.perf_counter()
+    
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started_at
+    
+    @property
+    def rows_per_second(self):
+        return self.imported / self.elapsed if self.elapsed else 0.0
+
+def detect_format(path):
+    """Guess the file format from its extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    raise ValueError(f"Cannot tell the format of {path}; pass --format")
+
+def iter_records(path, file_format):
+    """
+    Stream raw records from a file
+    
+    Yields:
+        Tuples of (line number, record dict or None if unparseable)
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if file_format == 'csv':
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                yield line_number, record if isinstance(record, dict) else None
+
+def parse_list(value):
+    """Read a list field: a list, a JSON array string or 'a|b|c'"""
+    if value is None or value == '':
+        return []
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    value = str(value).strip()
+    if value.startswith('['):
+        return [str(item) for item in json.loads(value)]
+    return [item.strip() for item in value.split('|') if item.strip()]
+
+def parse_number(value, cast):
+    """Read an optional number, treating '' as missing and rejecting NaN and infinity"""
+    if value is None or value == '':
+        return None
+    number = cast(value)
+    if not math.isfinite(number):
+        raise ValueError(f'{value!r} is not a finite number')
+    return number
+
+def validate_record(record):
+    """
+    Turn a raw record into a row for the recipes table
+    
+    Missing calories are computed from protein, carbs and fats.
+    
+    Returns:
+        Tuple of (row dict, list of tag names)
+    
+    Raises:
+        ValueError: if the record is unusable
+    """
+    if record is None:
+        raise ValueError('not a valid record')
+    
+    row = {}
+    for field in TEXT_FIELDS:
+        value = record.get(field)
+        row[field] = str(value).strip() if value not in (None, '') else None
+    if not row['name']:
+        raise ValueError('name is required')
+    if not row['description']:
+        raise ValueError('description is required')
+    
+    try:
+        for field in NUMBER_FIELDS:
+            row[field] = parse_number(record.get(field), float)
+        for field in INTEGER_FIELDS:
+            row[field] = parse_number(record.get(field), int)
+        lists = {field: parse_list(record.get(field)) for field in LIST_FIELDS}
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'bad value: {e}') from e
+    
+    if row['calories'] is None:
+        if None in (row['protein'], row['carbs'], row['fats']):
+            raise ValueError('calories are required unless protein, carbs and fats are given')
+        row['calories'] = calculate_calories_from_macros(row['protein'], row['carbs'], row['fats'])
+    if any(row[field] is not None and row[field] < 0 for field in NUMBER_FIELDS):
+        raise ValueError('nutrition values must not be negative')
+    if row['servings'] is None:
+        row['servings'] = 1
+    
+    for field in LIST_FIELDS:
+        row[f'{field}_json'] = encode_json_field(lists[field])
+    return row, lists['tags']
+
+def insert_batch(batch):
+    """Insert validated rows and their tags, returning the number inserted"""
+    if not batch:
+        return 0
+    rows = [row for row, _ in batch]
+    recipe_ids = db.session.scalars(
+        db.insert(Recipe).returning(Recipe.id, sort_by_parameter_order=True),
+        rows
+    ).all()
+    Tag.link_recipes(zip(recipe_ids, (tags for _, tags in batch)))
+    return len(recipe_ids)
+
+def checkpoint_path(path):
+    """File recording how many input rows have been committed"""
+    return path + '.progress'
+
+def import_recipes(path, file_format=None, batch_size=1000, resume=True, report=print):
+    """
+    Import recipes from a CSV or JSONL file
+    
+    Args:
+        path: Input file
+        file_format: 'csv' or 'jsonl' (default: from the extension)
+        batch_size: Rows per INSERT and commit
+        resume: Skip rows committed by an earlier, interrupted run
+        report: Function called with progress lines
+    
+    Returns:
+        ImportStats for the run
+    """
+    file_format = file_format or detect_format(path)
+    checkpoint = checkpoint_path(path)
+    
+    skip = 0
+    if resume and os.path.exists(checkpoint):
+        with open(checkpoint) as f:
+            skip = int(f.read().strip() or 0)
+        report(f"Resuming after {skip} rows")
+    
+    stats = ImportStats(resumed_from=skip)
+    batch = []
+    
+    def flush():
+        stats.imported += insert_batch(batch)
+        db.session.commit()
+        with open(checkpoint, 'w') as f:
+            f.write(str(stats.processed))
+        batch.clear()
+        report(f"{stats.processed} rows processed, {stats.imported} imported "
+               f"({stats.rows_per_second:.0f} rows/sec)")
+    
+    try:
+        for index, (line_number, record) in enumerate(iter_records(path, file_format)):
+            if index < skip:
+                continue
+            try:
+                row, tags = validate_record(record)
+                batch.append((row, tags))
+                if row['image_url'] and row['image_url'].startswith('/static/'):
+                    stats.image_urls.add(row['image_url'])
+            except ValueError as e:
+                stats.invalid += 1
+                stats.errors.append(f"line {line_number}: {e}")
+            stats.processed += 1
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        if stats.imported:
+            recipes_changed()
+    
+    os.remove(checkpoint)
+    return stats
@@ -0,0 +1,122 @@
+"""
+Array-backed recipe nutrition matrix for fast selection queries
+"""
+import numpy as np
+from sqlalchemy import func
+from models import db
+from models.recipe import Recipe
+from utils.cache import LRUCache, on_recipes_changed
+
+# Weights of calories, protein, carbs and fats when matching a target
+MATCH_WEIGHTS = np.array([2.0, 1.0, 1.0, 1.0])
+
+# The loaded matrix, dropped on recipe writes in this process and
+# reloaded at least every TTL seconds to pick up other workers' writes
+matrix_cache = LRUCache(max_entries=1, ttl=300)
+
+class NutritionMatrix:
+    """
+    Per-recipe nutrition values held in NumPy arrays
+    
+    Row i describes recipe ids[i]: its category and one column per
+    nutrient in COLUMNS. Missing nutrients are stored as 0.
+    """
+    COLUMNS = ('calories', 'protein', 'carbs', 'fats', 'fiber')
+    
+    def __init__(self, ids, categories, values):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.categories = np.asarray(categories, dtype=object)
+        self.values = np.asarray(values, dtype=np.float64).reshape(len(self.ids), len(self.COLUMNS))
+        self._category_rows = {}
+    
+    @classmethod
+    def from_database(cls):
+        """Load every recipe's nutrition with one column-only query"""
+        rows = db.session.execute(db.select(
+            Recipe.id,
+            Recipe.category,
+            Recipe.calories,
+            func.coalesce(Recipe.protein, 0),
+            func.coalesce(Recipe.carbs, 0),
+            func.coalesce(Recipe.fats, 0),
+            func.coalesce(Recipe.fiber, 0)
+        ).order_by(Recipe.id)).all()
+        
+        return cls(
+            ids=[row[0] for row in rows],
+            categories=[row[1] for row in rows],
+            values=[row[2:] for row in rows]
+        )
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def column(self, name):
+        """Get one nutrient column as an array"""
+        return self.values[:, self.COLUMNS.index(name)]
+    
+    def category_rows(self, category):
+        """Get the row indexes of recipes in a category"""
+        if category not in self._category_rows:
+            self._category_rows[category] = np.flatnonzero(self.categories == category)
+        return self._category_rows[category]
+    
+    def rows_for_ids(self, recipe_ids):
+        """
+        Map recipe ids to row indexes
+        
+        Returns:
+            Array of row indexes, -1 where the id is unknown
+        """
+        recipe_ids = np.asarray(recipe_ids, dtype=np.int64)
+        if len(self.ids) == 0:
+            return np.full(len(recipe_ids), -1)
+        positions = np.searchsorted(self.ids, recipe_ids).clip(max=len(self.ids) - 1)
+        return np.where(self.ids[positions] == recipe_ids, positions, -1)
+    
+    def recommend(self, target, k=10, category=None, max_calories=None):
+        """
+        Find the recipes whose nutrition is closest to a target
+        
+        Distance is the weighted squared relative difference over
+        calories, protein, carbs and fats; overshooting the target counts
+        double so recipes that fit inside a budget rank first.
+        
+        Args:
+            target: Dictionary with calories, protein, carbs and fats
+            k: Number of recipes to return
+            category: Only consider recipes in this category
+            max_calories: Only consider recipes at or below this many calories
+        
+        Returns:
+            Tuple of (recipe ids, distances), best match first
+        """
+        rows = self.category_rows(category) if category else np.arange(len(self))
+        if max_calories is not None:
+            rows = rows[self.values[rows, 0] <= max_calories]
+        if len(rows) == 0:
+            return np.array([], dtype=np.int64), np.array([])
+        
+        goal = np.array([target[name] for name in self.COLUMNS[:4]], dtype=np.float64)
+        scale = np.where(goal > 0, goal, 1.0)
+        diff = (self.values[rows, :4] - goal) / scale
+        diff = np.where(diff > 0, diff * 2, diff)
+        distance = (diff ** 2 * MATCH_WEIGHTS).sum(axis=1)
+        
+        k = min(k, len(rows))
+        best = np.argpartition(distance, k - 1)[:k]
+        best = best[np.argsort(distance[best], kind='stable')]
+        return self.ids[rows[best]], distance[best]
+
+def get_nutrition_matrix():
+    """Get the cached nutrition matrix, loading it if needed"""
+    matrix = matrix_cache.get('matrix')
+    if matrix is None:
+        matrix = NutritionMatrix.from_database()
+        matrix_cache.set('matrix', matrix)
+    return matrix
+
+@on_recipes_changed
+def clear_nutrition_matrix():
+    """Reload the matrix after recipes change"""
+    matrix_cache.clear()
@@ -0,0 +1,189 @@
+"""
+Full-text recipe search backed by an SQLite FTS5 index, or on PostgreSQL
+by a GIN index over a weighted tsvector of the same columns
+"""
+import re
+from sqlalchemy import text
+from models import db
+from models.recipe import Recipe
+
+# External-content FTS5 table over the searchable recipe columns.
+# prefix='2 3' keeps short type-ahead prefixes fast.
+CREATE_INDEX_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5(
+        name, description, ingredients_json, tags_json,
+        content='recipes', content_rowid='id',
+        tokenize='unicode61', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_insert AFTER INSERT ON recipes BEGIN
+        INSERT INTO recipes_fts(rowid, name, description, ingredients_json, tags_json)
+        VALUES (new.id, new.name, new.description, new.ingredients_json, new.tags_json);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_delete AFTER DELETE ON recipes BEGIN
+        INSERT INTO recipes_fts(recipes_fts, rowid, name, description, ingredients_json, tags_json)
+        VALUES ('delete', old.id, old.name, old.description, old.ingredients_json, old.tags_json);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_update AFTER UPDATE ON recipes BEGIN
+        INSERT INTO recipes_fts(recipes_fts, rowid, name, description, ingredients_json, tags_json)
+        VALUES ('delete', old.id, old.name, old.description, old.ingredients_json, old.tags_json);
+        INSERT INTO recipes_fts(rowid, name, description, ingredients_json, tags_json)
+        VALUES (new.id, new.name, new.description, new.ingredients_json, new.tags_json);
+    END
+    """
+]
+
+# bm25 column weights: name, description, ingredients, tags
+SEARCH_SQL = text("""
+    SELECT recipes.*
+    FROM recipes_fts
+    JOIN recipes ON recipes.id = recipes_fts.rowid
+    WHERE recipes_fts MATCH :match
+    ORDER BY bm25(recipes_fts, 10.0, 4.0, 2.0, 3.0)
+    LIMIT :limit OFFSET :offset
+""")
+
+# Weights mirror the bm25 ones: name A, description B, tags C, ingredients D.
+# Queries must repeat this exact expression for the index to be used.
+POSTGRES_DOCUMENT = """(
+    setweight(to_tsvector('simple', coalesce(recipes.name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(recipes.description, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(recipes.tags_json::text, '')), 'C') ||
+    setweight(to_tsvector('simple', coalesce(recipes.ingredients_json::text, '')), 'D')
+)"""
+
+POSTGRES_CREATE_INDEX_SQL = f"""
+    CREATE INDEX IF NOT EXISTS ix_recipes_search ON recipes USING GIN ({POSTGRES_DOCUMENT})
+"""
+
+POSTGRES_SEARCH_SQL = text(f"""
+    SELECT recipes.*
+    FROM recipes, to_tsquery('simple', :match) AS query
+    WHERE {POSTGRES_DOCUMENT} @@ query
+    ORDER BY ts_rank({POSTGRES_DOCUMENT}, query) DESC, recipes.id
+    LIMIT :limit OFFSET :offset
+""")
+
+def search_index_supported():
+    """FTS5 is only available on SQLite, tsvector on PostgreSQL"""
+    return db.engine.dialect.name in ('sqlite', 'postgresql')
+
+def create_search_index():
+    """Create the FTS5 table and sync triggers, backfilling existing recipes"""
+    if not search_index_supported():
+        return
+    
+    if db.engine.dialect.name == 'postgresql':
+        # An expression index needs no triggers or backfill
+        db.session.execute(text(POSTGRES_CREATE_INDEX_SQL))
+        db.session.commit()
+        return
+    
+    exists = db.session.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipes_fts'"
+    )).first()
+    
+    for statement in CREATE_INDEX_SQL:
+        db.session.execute(text(statement))
+    
+    if not exists:
+        rebuild_search_index()
+    db.session.commit()
+
+def rebuild_search_index():
+    """Re-index every recipe from the recipes table"""
+    db.session.execute(text("INSERT INTO recipes_fts(recipes_fts) VALUES ('rebuild')"))
+
+def build_match_query(query_string):
+    """
+    Turn free text into an FTS5 query matching every term as a prefix
+    
+    Args:
+        query_string: Raw user input, e.g. 'chick sal'
+    
+    Returns:
+        FTS5 MATCH expression, e.g. '"chick"* "sal"*', or None if empty
+    """
+    terms = re.findall(r'\w+', query_string)
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def build_tsquery(query_string):
+    """
+    PostgreSQL counterpart of build_match_query
+    
+    Returns:
+        tsquery text, e.g. 'chick:* & sal:*', or None if empty
+    """
+    terms = re.findall(r'[^\W_]+', query_string)
+    if not terms:
+        return None
+    return ' & '.join(f'{term}:*' for term in terms)
+
+def search_recipes(query_string, page=1, per_page=20):
+    """
+    Search recipes by name, description, ingredients and tags
+    
+    Args:
+        query_string: Free-text search input
+        page: 1-based page number
+        per_page: Results per page
+    
+    Returns:
+        List of Recipe objects, best matches first
+    """
+    offset = (max(page, 1) - 1) * per_page
+    return list(execute_search(query_string, per_page, offset))
+
+def iter_search_results(query_string, batch_size=500):
+    """
+    Every match for a search, best first, fetched batch_size rows at a time
+    
+    Returns:
+        Iterator of Recipe objects
+    """
+    return execute_search(query_string, None, 0, batch_size)
+
+def execute_search(query_string, limit, offset, batch_size=None):
+    """
+    Run a search query
+    
+    Args:
+        query_string: Free-text search input
+        limit: Maximum number of results, or None for all
+        offset: Results to skip
+        batch_size: Stream rows in batches of this size instead of
+            fetching them all at once
+    
+    Returns:
+        Iterable of Recipe objects, best matches first
+    """
+    if not search_index_supported():
+        query = Recipe.query.filter(
+            (Recipe.name.ilike(f'%{query_string}%')) |
+            (Recipe.description.ilike(f'%{query_string}%'))
+        ).order_by(Recipe.id).offset(offset).limit(limit)
+        return query.yield_per(batch_size) if batch_size else query.all()
+    
+    if db.engine.dialect.name == 'postgresql':
+        # LIMIT NULL means no limit
+        match, statement = build_tsquery(query_string), POSTGRES_SEARCH_SQL
+    else:
+        # SQLite has no LIMIT ALL; a negative limit means none
+        match, statement = build_match_query(query_string), SEARCH_SQL
+        limit = -1 if limit is None else limit
+    if not match:
+        return []
+    
+    return db.session.scalars(
+        db.select(Recipe).from_statement(statement),
+        {'match': match, 'limit': limit, 'offset': offset},
+        execution_options={'yield_per': batch_size} if batch_size else {}
+    )
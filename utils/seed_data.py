@@ -17,15 +17,15 @@ def seed_database():
         print("Warning: Database already contains data. Skipping seed.")
         return
     
-    # Create default user
-    user = User(
-        username='demo_user',
-        calorie_goal=2000,
-        protein_goal=150,
-        carbs_goal=200,
-        fats_goal=65
-    )
-    db.session.add(user)
+    # Create default user, or reset the goals of one created at startup
+    user = User.query.filter_by(username='demo_user').first()
+    if not user:
+        user = User(username='demo_user')
+        db.session.add(user)
+    user.calorie_goal = 2000
+    user.protein_goal = 150
+    user.carbs_goal = 200
+    user.fats_goal = 65
     
     # Sample recipes data
     recipes_data = [
@@ -0,0 +1,65 @@
+"""
+Prebuilt read-only SQLite snapshots for serverless deployments
+
+Instead of creating tables and seeding an in-memory database on every
+cold start, a snapshot file is built once (`flask build-snapshot`) and
+each instance opens it immutable and memory-mapped: no schema work, no
+inserts, no locking, and pages are shared through the OS page cache.
+"""
+import os
+import sqlite3
+from flask import jsonify
+from sqlalchemy.exc import OperationalError
+from models import db
+from utils.sqlite_pragmas import apply_sqlite_pragmas
+
+# Bytes of the snapshot to memory-map (the seeded database is far smaller)
+SNAPSHOT_MMAP_SIZE = 256 * 1024 * 1024
+
+def init_snapshot(app):
+    """
+    Configure the app's engine for a read-only snapshot
+    
+    Writes are answered with 503 instead of a server error.
+    """
+    apply_sqlite_pragmas(db.engine, {'mmap_size': SNAPSHOT_MMAP_SIZE, 'query_only': 'ON'})
+    
+    @app.errorhandler(OperationalError)
+    def read_only_database(error):
+        if 'readonly' not in str(error.orig) and 'read-only' not in str(error.orig):
+            raise error
+        db.session.rollback()
+        return jsonify({'error': 'This deployment is read-only'}), 503
+
+def build_snapshot(path):
+    """
+    Build a seeded snapshot database at path, replacing any existing file
+    
+    Returns:
+        Size of the snapshot in bytes
+    """
+    from app import create_app
+    from config import Config
+    from utils.seed_data import seed_database
+    
+    path = os.path.abspath(path)
+    if os.path.exists(path):
+        os.remove(path)
+    
+    class SnapshotBuildConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        DATABASE_SNAPSHOT = None
+    
+    app = create_app(SnapshotBuildConfig)
+    with app.app_context():
+        seed_database()
+        db.engine.dispose()
+    
+    # Compact the file and drop the WAL so it can be opened immutable
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode = DELETE")
+    connection.execute("ANALYZE")
+    connection.execute("VACUUM")
+    connection.close()
+    return os.path.getsize(path)
@@ -0,0 +1,157 @@
+"""
+Per-request SQL instrumentation
+
+Engine events time every statement and add it to the current request's
+metrics. Each response gets a Server-Timing header with the query count
+and database time, requests over the configured thresholds are logged
+with their slowest statements, and per-endpoint totals are kept in
+process for /debug/metrics.
+"""
+import threading
+import time
+from datetime import datetime
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from models import db
+
+# Slowest statements kept per request and per process
+SLOWEST_PER_REQUEST = 3
+SLOWEST_OVERALL = 10
+
+# Longest SQL text kept for a statement
+MAX_STATEMENT_LENGTH = 500
+
+def keep_slowest(slowest, entry, limit):
+    """Insert a (ms, ...) tuple into a list sorted slowest first, bounded to limit"""
+    if len(slowest) >= limit and entry[0] <= slowest[-1][0]:
+        return
+    slowest.append(entry)
+    slowest.sort(key=lambda item: item[0], reverse=True)
+    del slowest[limit:]
+
+class RequestMetrics:
+    """Queries issued while handling one request"""
+    
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.slowest = []
+    
+    def record(self, statement, ms):
+        self.queries += 1
+        self.db_ms += ms
+        keep_slowest(self.slowest, (ms, statement[:MAX_STATEMENT_LENGTH]), SLOWEST_PER_REQUEST)
+    
+    @property
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started_at) * 1000
+
+class MetricsRegistry:
+    """Thread-safe per-endpoint totals for this process"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self.since = datetime.utcnow()
+            self.endpoints = {}
+            self.slowest = []
+    
+    def add(self, endpoint, metrics, elapsed_ms, slow):
+        with self._lock:
+            totals = self.endpoints.setdefault(endpoint, {
+                'requests': 0, 'slow_requests': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'queries': 0, 'max_queries': 0, 'db_ms': 0.0
+            })
+            totals['requests'] += 1
+            totals['slow_requests'] += slow
+            totals['total_ms'] += elapsed_ms
+            totals['max_ms'] = max(totals['max_ms'], elapsed_ms)
+            totals['queries'] += metrics.queries
+            totals['max_queries'] = max(totals['max_queries'], metrics.queries)
+            totals['db_ms'] += metrics.db_ms
+            for ms, statement in metrics.slowest:
+                keep_slowest(self.slowest, (ms, statement, endpoint), SLOWEST_OVERALL)
+    
+    def to_dict(self):
+        """Averages per endpoint and the slowest statements seen"""
+        with self._lock:
+            endpoints = {
+                endpoint: {
+                    'requests': totals['requests'],
+                    'slow_requests': totals['slow_requests'],
+                    'avg_ms': round(totals['total_ms'] / totals['requests'], 2),
+                    'max_ms': round(totals['max_ms'], 2),
+                    'avg_queries': round(totals['queries'] / totals['requests'], 2),
+                    'max_queries': totals['max_queries'],
+                    'avg_db_ms': round(totals['db_ms'] / totals['requests'], 2)
+                }
+                for endpoint, totals in sorted(self.endpoints.items())
+            }
+            slowest = [
+                {'ms': round(ms, 2), 'endpoint': endpoint, 'statement': statement}
+                for ms, statement, endpoint in self.slowest
+            ]
+        return {'since': self.since.isoformat(), 'endpoints': endpoints, 'slowest_statements': slowest}
+
+def init_sql_metrics(app):
+    """Hook statement timing into the app's engine and requests"""
+    registry = MetricsRegistry()
+    app.extensions['sql_metrics'] = registry
+    if not app.config.get('SQL_METRICS'):
+        return
+    
+    with app.app_context():
+        engine = db.engine
+    
+    # The start time lives on the statement's execution context, so a
+    # statement that fails leaves nothing behind for the next one
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_statement(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.sql_metrics_started_at = time.perf_counter()
+    
+    @event.listens_for(engine, 'after_cursor_execute')
+    def finish_statement(conn, cursor, statement, parameters, context, executemany):
+        started_at = getattr(context, 'sql_metrics_started_at', None)
+        metrics = g.get('sql_metrics') if has_app_context() else None
+        if metrics is not None and started_at is not None:
+            metrics.record(statement, (time.perf_counter() - started_at) * 1000)
+    
+    @app.before_request
+    def start_request_metrics():
+        g.sql_metrics = RequestMetrics()
+    
+    @app.after_request
+    def add_server_timing(response):
+        metrics = g.get('sql_metrics')
+        if metrics is not None:
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={metrics.db_ms:.1f};desc="{metrics.queries} queries", '
+                f'app;dur={metrics.elapsed_ms:.1f}'
+            )
+        return response
+    
+    # Teardown runs after streamed bodies finish, so totals include them
+    @app.teardown_request
+    def record_request_metrics(error=None):
+        metrics = g.pop('sql_metrics', None)
+        if metrics is None:
+            return
+        elapsed_ms = metrics.elapsed_ms
+        endpoint = request.endpoint or 'unmatched'
+        slow = elapsed_ms > app.config['SLOW_REQUEST_MS'] or \
+            metrics.queries > app.config['SLOW_REQUEST_QUERIES']
+        registry.add(endpoint, metrics, elapsed_ms, slow)
+        
+        if slow:
+            app.logger.warning(
+                "Slow request %s %s: %.1fms, %d queries, %.1fms in the database; slowest: %s",
+                request.method, request.full_path.rstrip('?'), elapsed_ms, metrics.queries,
+                metrics.db_ms, '; '.join(f"{ms:.1f}ms {' '.join(sql.split())[:200]}"
+                                         for ms, sql in metrics.slowest) or 'none'
+            )
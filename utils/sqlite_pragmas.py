@@ -0,0 +1,24 @@
+"""
+Connection-level PRAGMA settings for SQLite databases
+"""
+from sqlalchemy import event
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """
+    Run PRAGMA statements on every new connection the engine opens
+    
+    Must be called before the engine's first connection.
+    
+    Args:
+        engine: SQLAlchemy engine for an SQLite database
+        pragmas: Dictionary of pragma name -> value, in execution order
+    """
+    if not pragmas:
+        return
+    
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
@@ -0,0 +1,27 @@
+"""
+Cold-start timing for the application factory
+"""
+import time
+
+class StartupTimer:
+    """Records how long each startup phase took, in milliseconds"""
+    
+    def __init__(self, started_at=None):
+        self.started_at = started_at or time.perf_counter()
+        self._last = self.started_at
+        self.timings = {}
+    
+    def mark(self, phase):
+        """Close the current phase under the given name"""
+        now = time.perf_counter()
+        self.timings[phase] = round((now - self._last) * 1000, 1)
+        self._last = now
+    
+    @property
+    def total(self):
+        return round((self._last - self.started_at) * 1000, 1)
+    
+    def summary(self):
+        """One-line breakdown, e.g. 'total 41.2ms (config 0.3ms, ...)'"""
+        phases = ', '.join(f"{phase} {ms}ms" for phase, ms in self.timings.items())
+        return f"total {self.total}ms ({phases})"